@@ -0,0 +1,57 @@
+import time
+from argparse import ArgumentParser
+
+from webapp.dto import AppConfig
+from webapp.utils import load_config_files
+from webapp.worker import Zygote, check_isolated, check_solution, isolated_check, spawning
+
+
+def check_inline(config: AppConfig, group: str, task: int, variant: int, code: str):
+    ok, error = check_solution(config.core_path, group, task, variant, code)
+    return ok, error, False
+
+
+def check_spawned(config: AppConfig, group: str, task: int, variant: int, code: str):
+    reader, writer = spawning.Pipe(duplex=False)
+    process = spawning.Process(target=isolated_check, args=(writer, config, group, task, variant, code))
+    process.start()
+    writer.close()
+    _, result = reader.recv()
+    process.join()
+    reader.close()
+    return (*result, False)
+
+
+def measure(name: str, check, checks: int, *args):
+    started = time.perf_counter()
+    for _ in range(checks):
+        check(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{name}: {round(checks / elapsed, 1)} checks/s, {round(elapsed / checks * 1000, 2)} ms per check")
+
+
+def main():
+    parser = ArgumentParser(description="compares solution check throughput of the isolation strategies")
+    parser.add_argument("--config", default="webapp")
+    parser.add_argument("--core", default=None)
+    parser.add_argument("--group", default="ИНБО-01-20")
+    parser.add_argument("--task", type=int, default=0)
+    parser.add_argument("--variant", type=int, default=0)
+    parser.add_argument("--code", default="main = lambda x: 42")
+    parser.add_argument("--checks", type=int, default=100)
+    args = parser.parse_args()
+    config = AppConfig(load_config_files(args.config))
+    config.core_path = args.core or config.core_path
+    config.check_zygote_recycle = args.checks + 1
+    request = (config, args.group, args.task, args.variant, args.code)
+    measure("spawn", check_spawned, args.checks, *request)
+    measure("fork", check_isolated, args.checks, *request)
+    zygote = Zygote(config.core_path)
+    zygote.check(*request)
+    measure("zygote", zygote.check, args.checks, *request)
+    zygote.stop()
+    measure("inline", check_inline, args.checks, *request)
+
+
+if __name__ == "__main__":
+    main()
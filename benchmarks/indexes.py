@@ -0,0 +1,133 @@
+import datetime
+import os
+import random
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import sqlalchemy as sa
+from sqlalchemy import desc
+from sqlalchemy.engine import Connection
+
+from webapp.commands import migrate
+from webapp.models import Message, MessageCheck, Student, TaskStatus
+
+
+GROUPS = 200
+VARIANTS = 40
+TASKS = 10
+STUDENTS = 20000
+CHUNK = 50000
+MESSAGE = (Message.id, Message.task, Message.variant, Message.group, Message.time, Message.code, Message.processed)
+CHECK = (MessageCheck.id, MessageCheck.message, MessageCheck.time, MessageCheck.status, MessageCheck.output)
+
+
+def queries(rnd: random.Random) -> dict[str, sa.Select]:
+    group = rnd.randrange(GROUPS)
+    variant = rnd.randrange(VARIANTS)
+    task = rnd.randrange(TASKS)
+    student = rnd.randrange(STUDENTS)
+    return {
+        "pending messages": sa.select(*MESSAGE)
+        .filter_by(processed=False)
+        .order_by(Message.time.asc()),
+        "messages by student": sa.select(*CHECK, *MESSAGE)
+        .join(Message, Message.id == MessageCheck.message)
+        .filter(Message.student == student)
+        .order_by(desc(Message.time))
+        .limit(10),
+        "messages by session": sa.select(*CHECK, *MESSAGE)
+        .join(Message, Message.id == MessageCheck.message)
+        .filter(Message.session_id == f"session-{student}")
+        .order_by(desc(Message.time))
+        .limit(10),
+        "messages by slot": sa.select(*CHECK, *MESSAGE)
+        .join(Message, Message.id == MessageCheck.message)
+        .filter(Message.group == group, Message.variant == variant, Message.task == task)
+        .order_by(desc(Message.time))
+        .limit(10),
+        "statuses by group": sa.select(TaskStatus.task, TaskStatus.variant, TaskStatus.status, TaskStatus.code)
+        .filter_by(group=group),
+        "student by email": sa.select(Student.id, Student.email, Student.password_hash)
+        .filter_by(email=f"student-{student}@example.com"),
+    }
+
+
+def seed(connection: Connection, messages: int, rnd: random.Random):
+    now = datetime.datetime.now()
+    connection.exec_driver_sql(
+        'INSERT INTO groups (id, title) VALUES (?, ?)',
+        [(g, f"group-{g}") for g in range(GROUPS)])
+    connection.exec_driver_sql(
+        'INSERT INTO variants (id) VALUES (?)',
+        [(v,) for v in range(VARIANTS)])
+    connection.exec_driver_sql(
+        'INSERT INTO tasks (id, type) VALUES (?, 0)',
+        [(t,) for t in range(TASKS)])
+    connection.exec_driver_sql(
+        'INSERT INTO students (id, email, blocked) VALUES (?, ?, 0)',
+        [(s, f"student-{s}@example.com") for s in range(STUDENTS)])
+    connection.exec_driver_sql(
+        'INSERT INTO task_statuses (task, variant, "group", time, code, ip, status) VALUES (?, ?, ?, ?, ?, ?, 2)',
+        [(t, v, g, now, "main = lambda: 42", "127.0.0.1")
+         for g in range(GROUPS) for v in range(VARIANTS) for t in range(TASKS) if rnd.random() < 0.5])
+    for start in range(0, messages, CHUNK):
+        rows = []
+        checks = []
+        for id in range(start, min(start + CHUNK, messages)):
+            student = rnd.randrange(STUDENTS)
+            processed = id < messages - 1000
+            time = now - datetime.timedelta(seconds=messages - id)
+            rows.append((
+                id, rnd.randrange(TASKS), rnd.randrange(VARIANTS), rnd.randrange(GROUPS), time,
+                "main = lambda: 42", "127.0.0.1", f"session-{student}", processed, student,
+            ))
+            if processed:
+                checks.append((id, id, time, 2, ""))
+        connection.exec_driver_sql(
+            'INSERT INTO messages (id, task, variant, "group", time, code, ip, session_id, processed, student) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        connection.exec_driver_sql(
+            'INSERT INTO message_checks (id, message, time, status, output) VALUES (?, ?, ?, ?, ?)', checks)
+
+
+def report(connection: Connection, title: str, repeat: int):
+    print(f"\n=== {title} ===")
+    for name, query in queries(random.Random(42)).items():
+        compiled = query.compile(connection, compile_kwargs={"literal_binds": True})
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(query).all()
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        print(f"{name}: {round(elapsed, 2)} ms")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+
+def main():
+    parser = ArgumentParser(description="compares hot query plans before and after adding indexes")
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        connection_string = "sqlite:///" + path
+        migrate(connection_string, "3782564289c1")
+        engine = sa.create_engine(connection_string)
+        rnd = random.Random(42)
+        print(f"Seeding {args.messages} messages...")
+        with engine.begin() as connection:
+            seed(connection, args.messages, rnd)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+            report(connection, "before", args.repeat)
+        migrate(connection_string)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+            report(connection, "after", args.repeat)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+from argparse import ArgumentParser
+from itertools import groupby
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from webapp.commands import migrate
+from webapp.repositories import AppDatabase
+
+
+GROUPS = 250
+VARIANTS = 40
+TASKS = 10
+PLACES = 8
+
+
+def seed(connection: Connection, rnd: random.Random):
+    now = datetime.datetime.now()
+    connection.exec_driver_sql(
+        'INSERT INTO groups (id, title) VALUES (?, ?)',
+        [(g, f"group-{g}") for g in range(GROUPS)])
+    connection.exec_driver_sql(
+        'INSERT INTO variants (id) VALUES (?)',
+        [(v,) for v in range(VARIANTS)])
+    connection.exec_driver_sql(
+        'INSERT INTO tasks (id, type) VALUES (?, 0)',
+        [(t,) for t in range(TASKS)])
+    connection.exec_driver_sql(
+        'INSERT INTO task_statuses (task, variant, "group", time, code, ip, status, achievements) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [(t, v, g, now, "main = lambda: 42", "127.0.0.1", 2 if rnd.random() < 0.97 else 3,
+          json.dumps(rnd.sample(range(5), rnd.randrange(3))))
+         for g in range(GROUPS) for v in range(VARIANTS) for t in range(TASKS)])
+
+
+def legacy_rating(connection: Connection):
+    tasks = connection.exec_driver_sql('SELECT count(*) FROM tasks').scalar()
+    statuses = connection.exec_driver_sql(
+        'SELECT "group", variant, task, achievements FROM task_statuses WHERE status IN (2, 5, 6)').all()
+    places = dict()
+    for (group, variant), rows in groupby(sorted(statuses, key=lambda r: (r[0], r[1])), lambda r: (r[0], r[1])):
+        rows = list(rows)
+        if len(rows) < tasks:
+            continue
+        earned = sum(len(json.loads(achievements or "[]") or [0]) for _, _, _, achievements in rows)
+        places.setdefault(earned, []).append((group, variant))
+    return dict(sorted(places.items(), reverse=True)[0:PLACES])
+
+
+def legacy_group_rating(connection: Connection):
+    tasks = connection.exec_driver_sql('SELECT count(*) FROM tasks').scalar()
+    rows = connection.exec_driver_sql(
+        'SELECT g.id, v.variant FROM groups g LEFT JOIN ('
+        'SELECT "group", variant FROM task_statuses WHERE status IN (2, 5, 6) '
+        'GROUP BY variant, "group" HAVING count(*) >= ?) v ON g.id = v."group"', (tasks,)).all()
+    places = dict()
+    for group, pairs in groupby(sorted(rows, key=lambda r: r[0]), lambda r: r[0]):
+        earned = sum(1 for _, variant in pairs if variant is not None and variant < 40)
+        places.setdefault(earned, []).append(group)
+    return dict(sorted(places.items(), reverse=True))
+
+
+def measure(name: str, function, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"{name}: {round(elapsed, 2)} ms")
+
+
+def main():
+    parser = ArgumentParser(description="compares Python and SQL side rating aggregation")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        connection_string = "sqlite:///" + os.path.join(directory, "bench.db")
+        migrate(connection_string, "e5f81c3a0d49")
+        engine = sa.create_engine(connection_string)
+        print(f"Seeding {GROUPS * VARIANTS * TASKS} task statuses...")
+        with engine.begin() as connection:
+            seed(connection, random.Random(42))
+        print("\n=== Python groupby over task_statuses ===")
+        with engine.connect() as connection:
+            measure("student rating", lambda: legacy_rating(connection), args.repeat)
+            measure("group rating", lambda: legacy_group_rating(connection), args.repeat)
+        engine.dispose()
+        migrate(connection_string)
+        db = AppDatabase(lambda: connection_string)
+        print("\n=== SQL aggregation over variant_scores ===")
+        measure("student rating", lambda: db.statuses.get_rating(PLACES), args.repeat)
+        measure("group rating", lambda: db.statuses.get_group_rating(dict(), 40), args.repeat)
+        db.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
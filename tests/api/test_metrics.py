@@ -0,0 +1,67 @@
+from tests.utils import arrange_task
+
+from flask import Flask
+from flask.testing import FlaskClient
+
+from webapp.dto import AppConfig
+from webapp.managers import ExternalTaskManager
+from webapp.metrics import cache_misses, cache_requests
+from webapp.repositories import AppDatabase
+from webapp.utils import ttl_cache
+from webapp.worker import process_pending_analyses, process_pending_messages
+
+
+def test_worker_metrics_export(queue: AppDatabase, app: Flask, client: FlaskClient):
+    app.config["CONNECTION_STRING"] = app.config["QUEUE_CONNECTION_STRING"]
+    config = AppConfig(app.config)
+    external = ExternalTaskManager(queue.groups, queue.tasks)
+    group, variant, task = arrange_task(queue)
+    message = queue.messages.submit_task(task, variant, group, "main = lambda x: 42", "0.0.0.0", None)
+    process_pending_messages(config, queue, external)
+    process_pending_analyses(config, queue)
+
+    check = queue.checks.get(message=message.id)
+    assert check.lookup_duration is not None
+    assert check.check_duration > 0
+    assert check.write_duration > 0
+    assert check.analysis_duration is not None
+    assert check.priority == "practice"
+    assert check.queue_duration >= 0
+
+    response = client.get("/api/v1/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    metrics = response.get_data(as_text=True)
+    assert "dta_queue_depth 0\n" in metrics
+    assert 'dta_recent_checks{status="Checked"} 1\n' in metrics
+    assert 'dta_check_stage_seconds{stage="check",quantile="0.99"}' in metrics
+    assert 'dta_check_latency_seconds_count ' in metrics
+    assert 'dta_queue_wait_seconds_count{priority="practice"}' in metrics
+
+
+def test_web_metrics_export(client: FlaskClient):
+    client.get("/api/v1/variant/list")
+
+    metrics = client.get("/api/v1/metrics").get_data(as_text=True)
+
+    assert 'dta_http_request_seconds_count{blueprint="api",endpoint="api.variant_list",method="GET",status="200"}' \
+        in metrics
+    assert 'dta_http_request_seconds_bucket{blueprint="api",endpoint="api.variant_list",method="GET",status="200",' \
+        'le="+Inf"}' in metrics
+    assert 'dta_db_query_seconds_count{operation="SELECT"}' in metrics
+    assert 'dta_db_sessions_total{mode="read"}' in metrics
+
+
+def test_cache_hits_and_misses_are_counted():
+    @ttl_cache(duration=60)
+    def square(value: int) -> int:
+        return value * value
+
+    name = square.__qualname__
+    square(2)
+    square(2)
+    square(3)
+
+    assert cache_requests.values[(name,)] == 3
+    assert cache_misses.values[(name,)] == 2
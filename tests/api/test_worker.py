@@ -1,34 +1,66 @@
+import datetime
 import json
+import socket
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
 
-from tests.utils import arrange_task, mode, timeout_assert
+import pytest
+import sqlalchemy as sa
+from tests.utils import arrange_task, mode, timeout_assert, unique_int
 
+from flask import Flask
 from flask.testing import FlaskClient
 
-from webapp.models import Status
+from webapp.dto import AppConfig
+from webapp.managers import ExternalTaskManager
+from webapp.models import Message, Status, TypeOfTask
 from webapp.repositories import AppDatabase
+from webapp.wakeup import ANALYSIS_CHANNEL, wakeup_path
+from webapp.worker import (
+    Zygote,
+    core_version,
+    get_core_version,
+    hash_code,
+    process_pending_analyses,
+    process_pending_messages,
+    reanalyze,
+    zygotes
+)
+
+
+def post_code(client: FlaskClient, url: str, code: str):
+    return client.post(
+        url,
+        data=json.dumps(dict(code=code)),
+        headers=dict(token="CHANGE_ME"),
+        content_type='application/json'
+    )
+
+
+def measure_latency(client: FlaskClient, url: str, code: str, status: Status, timeout: float = 20) -> float:
+    started = time.perf_counter()
+    post_code(client, url, code)
+    while client.get(url).json["status"] != status:
+        assert time.perf_counter() - started < timeout
+        time.sleep(0.01)
+    return time.perf_counter() - started
 
 
 @mode("worker")
 def test_background_task_check(db: AppDatabase, client: FlaskClient):
-    def post_code(url: str, code: str):
-        return client.post(
-            url,
-            data=json.dumps(dict(code=code)),
-            headers=dict(token="CHANGE_ME"),
-            content_type='application/json'
-        )
-
     group, variant, task = arrange_task(db)
     url = f"/api/v1/group/{group}/variant/{variant}/task/{task}"
 
-    response = post_code(url, "main = lambda x: 42")
+    response = post_code(client, url, "main = lambda x: 42")
     assert response.json["status"] == Status.Submitted
     timeout_assert(lambda: client.get(url).json["status"] == Status.Checked)
 
-    post_code(url, "main = lambda x: 'forty-two'")
+    post_code(client, url, "main = lambda x: 'forty-two'")
     timeout_assert(lambda: client.get(url).json["status"] == Status.CheckedFailed)
 
-    post_code(url, "main = lambda x: 42")
+    post_code(client, url, "main = lambda x: 42")
     timeout_assert(lambda: client.get(url).json["status"] == Status.Checked)
 
     messages = db.messages.get(task=task, variant=variant, group=group)
@@ -37,3 +69,327 @@ def test_background_task_check(db: AppDatabase, client: FlaskClient):
         message = messages[index]
         check = db.checks.get(message=message.id)
         assert check.status == status
+
+
+@mode("worker")
+def test_background_task_check_latency(db: AppDatabase, client: FlaskClient):
+    group, variant, task = arrange_task(db)
+    url = f"/api/v1/group/{group}/variant/{variant}/task/{task}"
+
+    measure_latency(client, url, "main = lambda x: 'forty-two'", Status.Failed)
+    latency = measure_latency(client, url, "main = lambda x: 42", Status.Checked)
+    print(f"Submit to verdict latency is {round(latency * 1000)} ms")
+    assert latency < 2
+
+
+def test_parallel_check_keeps_slot_order(db: AppDatabase, app: Flask):
+    config = AppConfig(app.config)
+    external = ExternalTaskManager(db.groups, db.tasks)
+    group, variant, task = arrange_task(db)
+    codes = ["main = lambda x: 'forty-two'", "main = lambda x: 42", "main = lambda x: 'forty-two'"]
+    for code in codes:
+        db.statuses.submit_task(task, variant, group, code, "0.0.0.0")
+        db.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        process_pending_messages(config, db, external, executor)
+
+    assert db.statuses.get_task_status(task, variant, group).status == Status.CheckedFailed
+    messages = sorted(db.messages.get(task=task, variant=variant, group=group), key=lambda m: m.id)
+    history = [Status.Failed, Status.Checked, Status.CheckedFailed]
+    checks = [db.checks.get(message=message.id) for message in messages]
+    assert [check.status for check in checks] == history
+    assert [check.id for check in checks] == sorted(check.id for check in checks)
+
+
+def test_leases_are_renewed_until_recorded(queue: AppDatabase, app: Flask, monkeypatch: pytest.MonkeyPatch):
+    config = AppConfig(app.config)
+    config.worker_lease = 1
+    config.verdict_cache = False
+    external = ExternalTaskManager(queue.groups, queue.tasks)
+    group, variant, task = arrange_task(queue)
+    for index in range(4):
+        queue.messages.submit_task(task, variant, group, f"main = lambda x: {index}", "0.0.0.0", None)
+    expired = []
+
+    def slow_check(config: AppConfig, group_title: str, task_id: int, variant_id: int, code: str):
+        time.sleep(0.5)
+        now = datetime.datetime.now()
+        messages = queue.messages.get(task=task, variant=variant, group=group)
+        expired.extend(message.id for message in messages if not message.processed and message.lease_expires < now)
+        return False, "", False, 0.5
+
+    monkeypatch.setattr("webapp.worker.run_check", slow_check)
+    process_pending_messages(config, queue, external, worker="worker")
+
+    assert expired == []
+    assert all(message.processed for message in queue.messages.get(task=task, variant=variant, group=group))
+
+
+def test_check_timeout_is_recorded(db: AppDatabase, app: Flask):
+    config = AppConfig(app.config)
+    config.check_timeout = 1
+    external = ExternalTaskManager(db.groups, db.tasks)
+    group, variant, task = arrange_task(db)
+    code = "while True: pass"
+    db.statuses.submit_task(task, variant, group, code, "0.0.0.0")
+    message = db.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+
+    process_pending_messages(config, db, external)
+
+    assert db.statuses.get_task_status(task, variant, group).status == Status.Failed
+    check = db.checks.get(message=message.id)
+    assert check.status == Status.TimedOut
+    assert check.output
+
+
+def test_zygote_is_recycled(app: Flask):
+    config = AppConfig(app.config)
+    config.check_zygote_recycle = 2
+    zygote = Zygote(config.core_path)
+    try:
+        assert zygote.check(config, "ИНБО-01-20", 0, 0, "main = lambda x: 42") == (True, "", False)
+        pid = zygote.process.pid
+        assert zygote.check(config, "ИНБО-01-20", 0, 0, "main = lambda x: 'forty-two'")[0] is False
+        assert zygote.process.pid == pid
+        assert zygote.check(config, "ИНБО-01-20", 0, 0, "main = lambda x: 42")[0] is True
+        assert zygote.process.pid != pid
+    finally:
+        zygote.stop()
+
+
+def test_cached_verdict_is_reused(db: AppDatabase, app: Flask):
+    config = AppConfig(app.config)
+    external = ExternalTaskManager(db.groups, db.tasks)
+    group, variant, task = arrange_task(db)
+    code = "main = lambda x: 42"
+    ext = external.get_external_task(
+        db.groups.get_by_id(group),
+        db.variants.get_by_id(variant),
+        db.tasks.get_by_id(task),
+        db.seeds.get_final_seed(group),
+        config,
+    )
+    key = (ext.group_title, ext.task, ext.variant, hash_code(code + " \t"), core_version(config.core_path))
+    db.verdicts.store(*key, False, "cached")
+    db.statuses.submit_task(task, variant, group, code, "0.0.0.0")
+    message = db.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+
+    process_pending_messages(config, db, external)
+
+    assert db.statuses.get_task_status(task, variant, group).status == Status.Failed
+    assert db.checks.get(message=message.id).output == "cached"
+
+
+def test_core_version_follows_the_core(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    (tmp_path / "core.py").write_text("VERSION = 1")
+    zygote = Zygote(str(tmp_path))
+    zygote.version = core_version(str(tmp_path))
+    stopped = []
+    monkeypatch.setattr(zygote, "stop", lambda: stopped.append(True))
+    monkeypatch.setitem(zygotes, str(tmp_path), zygote)
+
+    assert get_core_version(str(tmp_path)) == zygote.version
+    assert not stopped
+
+    (tmp_path / "core.py").write_text("VERSION = 22")
+    assert get_core_version(str(tmp_path)) != zygote.version
+    assert stopped
+
+
+def test_wakeup_socket_is_keyed_by_database(monkeypatch: pytest.MonkeyPatch):
+    first = wakeup_path("web-app-worker.sock", sa.make_url("sqlite:///first.db"))
+    second = wakeup_path("web-app-worker.sock", sa.make_url("sqlite:///second.db"))
+    assert first != second
+    assert first.startswith("web-app-worker-") and first.endswith(".sock")
+    assert wakeup_path("web-app-worker.sock", sa.make_url("sqlite:///first.db"), ANALYSIS_CHANNEL) != first
+    assert wakeup_path(None, sa.make_url("sqlite:///first.db")) is None
+
+    monkeypatch.delattr(socket, "AF_UNIX")
+    assert wakeup_path("web-app-worker.sock", sa.make_url("sqlite:///first.db")) is None
+
+
+def test_code_hash_keeps_indentation():
+    code = "def main(x):\n    if x:\n        return 1\n    return 2\n"
+    assert hash_code(code.replace("\n", "  \r\n")) == hash_code(code)
+    assert hash_code(code.replace("    return 2", "        return 2")) != hash_code(code)
+    assert hash_code("\n" + code) != hash_code(code)
+
+
+def test_superseded_submissions_are_coalesced(db: AppDatabase, app: Flask):
+    config = AppConfig(app.config)
+    config.coalesce_submissions = True
+    external = ExternalTaskManager(db.groups, db.tasks)
+    group, variant, task = arrange_task(db)
+    for code in ["main = lambda x: 42", "main = lambda x: 'forty-two'", "main = lambda x: 42"]:
+        db.statuses.submit_task(task, variant, group, code, "0.0.0.0")
+        db.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+
+    process_pending_messages(config, db, external)
+
+    assert db.statuses.get_task_status(task, variant, group).status == Status.Checked
+    messages = sorted(db.messages.get(task=task, variant=variant, group=group), key=lambda m: m.id)
+    history = [Status.Superseded, Status.Superseded, Status.Checked]
+    assert [db.checks.get(message=message.id).status for message in messages] == history
+    assert all(message.processed for message in messages)
+
+
+def test_coalescing_keeps_earlier_correct_submission(db: AppDatabase, app: Flask):
+    config = AppConfig(app.config)
+    config.coalesce_submissions = True
+    external = ExternalTaskManager(db.groups, db.tasks)
+    group, variant, task = arrange_task(db)
+    for code in ["main = lambda x: 42", "main = lambda x: 'forty-two'"]:
+        db.statuses.submit_task(task, variant, group, code, "0.0.0.0")
+        db.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        process_pending_messages(config, db, external, executor)
+
+    assert db.statuses.get_task_status(task, variant, group).status == Status.CheckedFailed
+    messages = sorted(db.messages.get(task=task, variant=variant, group=group), key=lambda m: m.id)
+    history = [Status.Checked, Status.CheckedFailed]
+    checks = [db.checks.get(message=message.id) for message in messages]
+    assert [check.status for check in checks] == history
+    assert [check.id for check in checks] == sorted(check.id for check in checks)
+
+
+def test_failing_check_is_quarantined(db: AppDatabase, app: Flask):
+    config = AppConfig(app.config)
+    config.worker_max_attempts = 3
+    config.worker_retry_backoff = 0
+    external = ExternalTaskManager(db.groups, db.tasks)
+    group, variant, task = arrange_task(db)
+    code = "crash = lambda x: 42"
+    db.statuses.submit_task(task, variant, group, code, "0.0.0.0")
+    message = db.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+
+    process_pending_messages(config, db, external)
+
+    message = db.messages.get_by_id(message.id)
+    assert not message.processed
+    assert message.quarantined
+    assert message.attempts == 3
+    assert "Checker has crashed" in message.error
+    assert db.checks.get(message=message.id) is None
+
+
+def test_analysis_runs_after_verdict(queue: AppDatabase, app: Flask, monkeypatch: pytest.MonkeyPatch):
+    calls = fake_analytics(monkeypatch, broken=False)
+    config = AppConfig(app.config)
+    external = ExternalTaskManager(queue.groups, queue.tasks)
+    group, variant, task = arrange_task(queue)
+    passed = queue.messages.submit_task(task, variant, group, "main = lambda x: 42", "0.0.0.0", None)
+    failed = queue.messages.submit_task(task, variant, group, "main = lambda x: 'forty-two'", "0.0.0.0", None)
+
+    process_pending_messages(config, queue, external)
+
+    assert queue.checks.get(message=passed.id).analysis_pending
+    assert not queue.checks.get(message=failed.id).analysis_pending
+
+    process_pending_analyses(config, queue)
+
+    check = queue.checks.get(message=passed.id)
+    assert not check.analysis_pending
+    assert check.achievement == 1
+    assert calls == [("analyze_solutions", task, ["main = lambda x: 42"])]
+
+
+def test_analysis_uses_external_task(queue: AppDatabase, app: Flask, monkeypatch: pytest.MonkeyPatch):
+    calls = fake_analytics(monkeypatch, broken=False)
+    monkeypatch.setattr("webapp.worker.run_check", lambda *args: (True, None, False, 0.0))
+    config = AppConfig(app.config)
+    external = ExternalTaskManager(queue.groups, queue.tasks)
+    group, variant, task = arrange_task(queue, TypeOfTask.Random)
+    config.final_tasks = {str(task): [7]}
+    queue.seeds.begin_final_test(group)
+    message = queue.messages.submit_task(task, variant, group, "main = lambda x: 42", "0.0.0.0", None)
+
+    process_pending_messages(config, queue, external)
+    process_pending_analyses(config, queue)
+
+    assert queue.checks.get(message=message.id).analysis_task == 7
+    assert calls == [("analyze_solutions", 7, ["main = lambda x: 42"])]
+
+
+def fake_analytics(monkeypatch: pytest.MonkeyPatch, broken: bool) -> list[tuple[str, int, list[str]]]:
+    calls = []
+    analytics = types.ModuleType("analyze_solution")
+
+    def analyze_solution(task: int, code: str):
+        calls.append(("analyze_solution", task, [code]))
+        return True, 0
+
+    def analyze_solutions(task: int, codes: list[str]):
+        calls.append(("analyze_solutions", task, list(codes)))
+        if broken:
+            raise RuntimeError("Batch analysis is broken")
+        return [(True, 1) for _ in codes]
+
+    analytics.analyze_solution = analyze_solution
+    analytics.analyze_solutions = analyze_solutions
+    monkeypatch.setitem(sys.modules, "analyze_solution", analytics)
+    return calls
+
+
+def arrange_analyses(db: AppDatabase) -> tuple[int, int, list[Message]]:
+    group, variant, task = arrange_task(db)
+    other = unique_int()
+    db.tasks.create(other, TypeOfTask.Static)
+    messages = []
+    for tid, code in [(task, "first"), (other, "second"), (task, "third")]:
+        message = db.messages.submit_task(tid, variant, group, code, "0.0.0.0", None)
+        db.checks.record_check(message.id, Status.Checked, "", analysis_pending=True)
+        messages.append(message)
+    return task, other, messages
+
+
+def test_programs_are_analyzed_in_batches(queue: AppDatabase, app: Flask, monkeypatch: pytest.MonkeyPatch):
+    calls = fake_analytics(monkeypatch, broken=False)
+    task, other, messages = arrange_analyses(queue)
+
+    process_pending_analyses(AppConfig(app.config), queue)
+
+    assert calls == [
+        ("analyze_solutions", task, ["first", "third"]),
+        ("analyze_solutions", other, ["second"]),
+    ]
+    assert [queue.checks.get(message=message.id).achievement for message in messages] == [1, 1, 1]
+
+
+def test_batch_analysis_falls_back_to_programs(queue: AppDatabase, app: Flask, monkeypatch: pytest.MonkeyPatch):
+    calls = fake_analytics(monkeypatch, broken=True)
+    task, other, messages = arrange_analyses(queue)
+
+    process_pending_analyses(AppConfig(app.config), queue)
+
+    assert calls == [
+        ("analyze_solutions", task, ["first", "third"]),
+        ("analyze_solution", task, ["first"]),
+        ("analyze_solution", task, ["third"]),
+        ("analyze_solutions", other, ["second"]),
+        ("analyze_solution", other, ["second"]),
+    ]
+    assert [queue.checks.get(message=message.id).achievement for message in messages] == [0, 0, 0]
+
+
+def test_reanalysis_resumes_from_checkpoint(queue: AppDatabase, app: Flask, monkeypatch: pytest.MonkeyPatch):
+    calls = fake_analytics(monkeypatch, broken=False)
+    config = AppConfig(app.config)
+    config.analysis_batch_size = 2
+    external = ExternalTaskManager(queue.groups, queue.tasks)
+    group, variant, task = arrange_task(queue)
+    code = "main = lambda x: 42"
+    queue.statuses.submit_task(task, variant, group, code, "0.0.0.0")
+    first = queue.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+    second = queue.messages.submit_task(task, variant, group, code, "0.0.0.0", None)
+    process_pending_messages(config, queue, external)
+    queue.analysis_results.store([(queue.checks.get(message=first.id).id, 5)])
+
+    reanalyze(config, queue, None)
+
+    assert calls == [("analyze_solutions", task, [code])]
+    assert queue.analysis_results.get_last_check() is None
+    assert queue.checks.get(message=first.id).achievement == 5
+    assert queue.checks.get(message=second.id).achievement == 1
+    assert 5 in queue.statuses.get_task_status(task, variant, group).achievements
@@ -2,12 +2,14 @@ import os
 import signal
 
 import pytest
+import sqlalchemy as sa
 
 from flask import Flask
 from flask.testing import FlaskClient
 
 from webapp.app import configure_app, configure_background_services
 from webapp.commands import migrate
+from webapp.dto import AppConfig
 from webapp.repositories import AppDatabase
 
 
@@ -35,6 +37,8 @@ def app(request):
     if param == 'enable-worker':
         wpid = app.config["WORKER_PID"]
         os.kill(wpid, signal.SIGTERM)
+        apid = app.config["ANALYSIS_PID"]
+        os.kill(apid, signal.SIGTERM)
     if param == 'enable-registration':
         mpid = app.config["MAILBOX_PID"]
         os.kill(mpid, signal.SIGTERM)
@@ -42,7 +46,20 @@ def app(request):
 
 @pytest.fixture()
 def db(app: Flask) -> AppDatabase:
-    return AppDatabase(lambda: app.config["CONNECTION_STRING"])
+    return AppDatabase(lambda: app.config["CONNECTION_STRING"], lambda: AppConfig(app.config).database_options)
+
+
+@pytest.fixture()
+def queue(app: Flask) -> AppDatabase:
+    connection_string = app.config["QUEUE_CONNECTION_STRING"]
+    engine = sa.create_engine(connection_string)
+    with engine.begin() as connection:
+        metadata = sa.MetaData()
+        metadata.reflect(connection)
+        metadata.drop_all(connection)
+    engine.dispose()
+    migrate(connection_string)
+    return AppDatabase(lambda: connection_string, lambda: AppConfig(app.config).database_options)
 
 
 @pytest.fixture()
@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from tests.utils import unique_str
+
+from flask import Flask
+
+from webapp.models import create_session_maker
+from webapp.repositories import AppDatabase, DbContextManager
+
+
+def test_session_maker_is_cached(app: Flask):
+    connection = app.config["CONNECTION_STRING"]
+    assert create_session_maker(connection) is create_session_maker(connection)
+
+
+def test_foreign_keys_enabled_on_connect(app: Flask):
+    if not app.config["CONNECTION_STRING"].startswith("sqlite"):
+        pytest.skip("PRAGMA is specific to SQLite.")
+    manager = DbContextManager(lambda: app.config["CONNECTION_STRING"])
+    with manager.create_session() as session:
+        enabled = session.execute(text("PRAGMA foreign_keys")).scalar()
+    assert enabled == 1
+
+
+def test_locked_write_is_retried(tmp_path):
+    path = tmp_path / "locked.db"
+    options = dict(busy_timeout=0, lock_retries=5, lock_backoff=0.05)
+    db = AppDatabase(lambda: "sqlite:///" + str(path), lambda: options)
+    db.groups.get_all()
+    lock = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    lock.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.2, lock.rollback).start()
+
+    db.groups.create(unique_str())
+
+    lock.close()
+    assert db.db.lock_stats.retries > 0
+    assert db.db.lock_stats.failures == 0
+    assert len(db.groups.get_all()) == 1
+
+
+def test_locked_write_gives_up(tmp_path):
+    path = tmp_path / "locked.db"
+    options = dict(busy_timeout=0, lock_retries=1, lock_backoff=0.01)
+    db = AppDatabase(lambda: "sqlite:///" + str(path), lambda: options)
+    db.groups.get_all()
+    lock = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    lock.execute("BEGIN IMMEDIATE")
+
+    with pytest.raises(OperationalError):
+        db.groups.create(unique_str())
+
+    lock.rollback()
+    lock.close()
+    assert db.db.lock_stats.retries == 1
+    assert db.db.lock_stats.failures == 1
+    assert not db.groups.get_all()
@@ -1,4 +1,4 @@
-from tests.utils import unique_str
+from tests.utils import arrange_task, unique_int, unique_str
 
 from webapp.repositories import AppDatabase
 
@@ -36,3 +36,12 @@ def test_group_fetching_by_prefix(db: AppDatabase):
     assert any(group.title == one for group in groups)
     assert any(group.title == two for group in groups)
     assert not any(group.title == three for group in groups)
+
+
+def test_groups_get_by_ids(db: AppDatabase):
+    (group_1, _, _) = arrange_task(db)
+    (group_2, _, _) = arrange_task(db)
+
+    groups = db.groups.get_by_ids([group_1, group_2, unique_int()])
+
+    assert sorted(group.id for group in groups) == sorted([group_1, group_2])
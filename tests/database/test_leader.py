@@ -0,0 +1,53 @@
+import sqlalchemy as sa
+from tests.utils import unique_str
+
+from webapp.leader import LeaderLock
+from webapp.repositories import AppDatabase
+
+
+def test_leader_lock_is_exclusive(db: AppDatabase, tmp_path):
+    name = unique_str()
+    leader = LeaderLock(name, db.db.engine, str(tmp_path))
+    follower = LeaderLock(name, db.db.engine, str(tmp_path))
+    other = LeaderLock(unique_str(), db.db.engine, str(tmp_path))
+    try:
+        assert leader.acquire()
+        assert not follower.acquire()
+        assert other.acquire()
+    finally:
+        leader.release()
+        follower.release()
+        other.release()
+
+
+def test_leader_lock_is_taken_over(db: AppDatabase, tmp_path):
+    name = unique_str()
+    leader = LeaderLock(name, db.db.engine, str(tmp_path))
+    follower = LeaderLock(name, db.db.engine, str(tmp_path))
+    try:
+        assert leader.acquire()
+        assert not follower.acquire()
+        leader.release()
+        assert follower.acquire()
+    finally:
+        leader.release()
+        follower.release()
+
+
+def test_leader_lock_is_lost_with_its_connection(db: AppDatabase, tmp_path):
+    name = unique_str()
+    leader = LeaderLock(name, db.db.engine, str(tmp_path))
+    follower = LeaderLock(name, db.db.engine, str(tmp_path))
+    try:
+        assert leader.acquire()
+        assert leader.held()
+        if db.db.engine.dialect.name != "postgresql":
+            return
+        pid = leader.connection.scalar(sa.text("SELECT pg_backend_pid()"))
+        with db.db.engine.connect() as connection:
+            connection.scalar(sa.text("SELECT pg_terminate_backend(:pid)"), dict(pid=pid))
+        assert not leader.held()
+        assert follower.acquire()
+    finally:
+        leader.release()
+        follower.release()
@@ -1,5 +1,6 @@
 from tests.utils import arrange_task, unique_int, unique_str
 
+from webapp.models import Status, TypeOfTask
 from webapp.repositories import AppDatabase
 
 
@@ -67,3 +68,167 @@ def test_message_get_pending(db: AppDatabase):
     assert not any(mess.processed for mess in messages)
     assert len(messages) == len(pending)
     assert messages[-1].code == pending[0].code
+
+
+def test_message_claim_pending(db: AppDatabase):
+    (group, variant, task) = arrange_task(db)
+    first = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    second = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    ids = {first.id, second.id}
+
+    claimed = db.messages.claim_pending(unique_str(), 10000, 60)
+    mine = [message for message in claimed if message.id in ids]
+    assert len(mine) == 2
+    assert all(message.attempts == 1 for message in mine)
+
+    claimed = db.messages.claim_pending(unique_str(), 10000, 60)
+    assert not any(message.id in ids for message in claimed)
+
+
+def test_message_claim_expired_lease(db: AppDatabase):
+    (group, variant, task) = arrange_task(db)
+    message = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    worker_1 = unique_str()
+    worker_2 = unique_str()
+
+    db.messages.claim_pending(worker_1, 10000, -1)
+    claimed = db.messages.claim_pending(worker_2, 10000, 60)
+    message = next(mess for mess in claimed if mess.id == message.id)
+    assert message.claimed_by == worker_2
+    assert message.attempts == 2
+
+    assert db.messages.renew_lease(worker_1, [message.id], 60) == 0
+    assert db.messages.renew_lease(worker_2, [message.id], 60) == 1
+    assert not db.messages.mark_as_processed(message.id, worker_1)
+    assert db.messages.mark_as_processed(message.id, worker_2)
+    assert db.messages.get_by_id(message.id).processed
+
+
+def test_message_claim_waits_for_leased_slot(queue: AppDatabase):
+    (group, variant, task) = arrange_task(queue)
+    (other_group, other_variant, other_task) = arrange_task(queue)
+    first = queue.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    worker_1 = unique_str()
+    worker_2 = unique_str()
+
+    assert [message.id for message in queue.messages.claim_pending(worker_1, 10, 60)] == [first.id]
+    second = queue.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    other = queue.messages.submit_task(other_task, other_variant, other_group, unique_str(), unique_str(), None)
+    assert [message.id for message in queue.messages.claim_pending(worker_2, 10, 60)] == [other.id]
+
+    assert queue.messages.mark_as_processed(first.id, worker_1)
+    assert [message.id for message in queue.messages.claim_pending(worker_2, 10, 60)] == [second.id]
+
+
+def test_message_get_superseded(db: AppDatabase):
+    (group, variant, task) = arrange_task(db)
+    first = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    second = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    (other_group, other_variant, other_task) = arrange_task(db)
+    other = db.messages.submit_task(other_task, other_variant, other_group, unique_str(), unique_str(), None)
+
+    superseded = db.messages.get_superseded([first.id, second.id, other.id])
+    assert superseded == {first.id: False}
+
+    db.statuses.check(task, variant, group, unique_str(), True, "", unique_str())
+    worker = unique_str()
+    db.messages.claim_pending(worker, 100000, 60)
+    db.messages.quarantine(second.id, worker, "crash")
+    assert db.messages.get_superseded([first.id, other.id]) == dict()
+
+    db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    assert db.messages.get_superseded([first.id, other.id]) == {first.id: True}
+
+
+def test_message_claim_round_robins_groups(queue: AppDatabase):
+    (group_1, variant_1, task_1) = arrange_task(queue)
+    (group_2, variant_2, task_2) = arrange_task(queue)
+    spam = [queue.messages.submit_task(task_1, variant_1, group_1, unique_str(), unique_str(), None) for _ in range(3)]
+    other = queue.messages.submit_task(task_2, variant_2, group_2, unique_str(), unique_str(), None)
+
+    claimed = queue.messages.claim_pending("worker", 2, 60)
+
+    assert [message.id for message in claimed] == [spam[0].id, other.id]
+
+
+def test_message_claim_prefers_exam_groups(queue: AppDatabase):
+    (group_1, variant_1, task_1) = arrange_task(queue)
+    (group_2, variant_2, task_2) = arrange_task(queue)
+    queue.seeds.begin_final_test(group_2)
+    queue.messages.submit_task(task_1, variant_1, group_1, unique_str(), unique_str(), None)
+    exam = [queue.messages.submit_task(task_2, variant_2, group_2, unique_str(), unique_str(), None) for _ in range(2)]
+
+    claimed = queue.messages.claim_pending("worker", 2, 60, dict(exam=4, practice=1))
+
+    assert [message.id for message in claimed] == [message.id for message in exam]
+
+
+def test_message_claim_keeps_slot_order_across_students(queue: AppDatabase):
+    (group, variant, task) = arrange_task(queue)
+    other_task = unique_int()
+    queue.tasks.create(other_task, TypeOfTask.Static)
+    first = queue.students.create(f"{unique_str()}@example.com", unique_str())
+    second = queue.students.create(f"{unique_str()}@example.com", unique_str())
+    earlier = queue.messages.submit_task(other_task, variant, group, unique_str(), unique_str(), first.id)
+    older = queue.messages.submit_task(task, variant, group, unique_str(), unique_str(), first.id)
+    newer = queue.messages.submit_task(task, variant, group, unique_str(), unique_str(), second.id)
+
+    claimed = queue.messages.claim_pending("worker", 2, 60)
+    assert [message.id for message in claimed] == [earlier.id, older.id]
+
+    assert queue.messages.mark_as_processed(older.id, "worker")
+    claimed = queue.messages.claim_pending("worker", 2, 60)
+    assert [message.id for message in claimed] == [newer.id]
+
+
+def test_message_claim_defers_code(db: AppDatabase):
+    (group, variant, task) = arrange_task(db)
+    code = unique_str()
+    message = db.messages.submit_task(task, variant, group, code, unique_str(), None)
+
+    claimed = db.messages.claim_pending(unique_str(), 100000, 60)
+    message = next(mess for mess in claimed if mess.id == message.id)
+
+    assert "code" not in message.__dict__
+    assert db.messages.get_codes([message.id]) == {message.id: code}
+
+
+def test_message_quarantine_and_requeue(db: AppDatabase):
+    (group, variant, task) = arrange_task(db)
+    message = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    worker = unique_str()
+
+    db.messages.claim_pending(worker, 100000, 60)
+    assert db.messages.retry_later(message.id, worker, -1, "first")
+    claimed = db.messages.claim_pending(worker, 100000, 60)
+    assert any(mess.id == message.id for mess in claimed)
+    assert db.messages.quarantine(message.id, worker, "second")
+    assert not any(mess.id == message.id for mess in db.messages.claim_pending(worker, 100000, -1))
+
+    quarantined = next(mess for mess in db.messages.get_quarantined() if mess.id == message.id)
+    assert quarantined.attempts == 2
+    assert quarantined.error == "second"
+
+    assert db.messages.requeue_quarantined() >= 1
+    assert not any(mess.id == message.id for mess in db.messages.get_quarantined())
+    claimed = db.messages.claim_pending(worker, 100000, 60)
+    message = next(mess for mess in claimed if mess.id == message.id)
+    assert message.attempts == 1
+    assert message.error is None
+
+
+def test_overtaken_quarantined_message_is_superseded(db: AppDatabase):
+    (group, variant, task) = arrange_task(db)
+    older = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    newer = db.messages.submit_task(task, variant, group, unique_str(), unique_str(), None)
+    worker = unique_str()
+
+    db.messages.claim_pending(worker, 100000, 60)
+    assert db.messages.quarantine(older.id, worker, "crashed")
+    assert db.messages.mark_as_processed(newer.id, worker)
+
+    db.messages.requeue_quarantined()
+    older = db.messages.get_by_id(older.id)
+    assert older.processed
+    assert not older.quarantined
+    assert db.checks.get(message=older.id).status == Status.Superseded
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+import sqlalchemy as sa
+from pytest_alembic.tests import test_single_head_revision, test_up_down_consistency, test_upgrade
+
+from alembic.config import Config
+from webapp.utils import load_config_files
+
+
+@pytest.fixture()
+def alembic_config() -> Config:
+    base = os.path.join(os.getcwd(), "webapp")
+    config = Config(os.path.join(base, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(base, "alembic"))
+    return config
+
+
+@pytest.fixture()
+def alembic_engine():
+    config = load_config_files(os.path.join(os.getcwd(), "tests"))
+    engine = sa.create_engine(config["MIGRATIONS_CONNECTION_STRING"])
+    with engine.begin() as connection:
+        metadata = sa.MetaData()
+        metadata.reflect(connection)
+        metadata.drop_all(connection)
+    yield engine
+    engine.dispose()
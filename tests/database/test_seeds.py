@@ -34,3 +34,15 @@ def test_final_test_is_finished(db: AppDatabase):
     assert seed is not None
     assert seed.group == group.id
     assert not seed.active
+
+
+def test_final_seeds_by_groups(db: AppDatabase):
+    group_1 = unique_str()
+    group_2 = unique_str()
+    db.groups.create_by_names([group_1, group_2])
+    ids = [db.groups.get_by_prefix(name)[0].id for name in (group_1, group_2)]
+
+    db.seeds.begin_final_test(ids[0])
+    seeds = db.seeds.get_final_seeds(ids)
+
+    assert [seed.group for seed in seeds] == [ids[0]]
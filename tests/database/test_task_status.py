@@ -1,3 +1,4 @@
+import pytest
 from tests.utils import arrange_task, unique_int, unique_str
 
 from webapp.models import Status
@@ -66,3 +67,77 @@ def test_task_status_check_unexisting(db: AppDatabase):
         db.statuses.check(task, variant, group, unique_str(), ok, unique_str(), unique_str())
         task_status = db.statuses.get_task_status(task, variant, group)
         assert task_status.status == expected
+
+
+def test_task_status_submit_after_check(db: AppDatabase):
+    (group, variant, task) = arrange_task(db)
+    code = unique_str()
+    for ok, expected in [
+        (False, Status.Submitted),
+        (True, Status.CheckedSubmitted),
+    ]:
+        db.statuses.check(task, variant, group, unique_str(), ok, unique_str(), unique_str())
+        task_status = db.statuses.submit_task(task, variant, group, code, unique_str())
+        assert task_status.status == expected
+        assert task_status.code == code
+        assert task_status.output is None
+
+
+def test_task_status_upsert_without_returning(db: AppDatabase, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(db.db.engine.dialect, "insert_returning", False)
+    (group, variant, task) = arrange_task(db)
+    code = unique_str()
+
+    assert db.statuses.submit_task(task, variant, group, code, unique_str()).status == Status.Submitted
+    assert db.statuses.check(task, variant, group, code, False, "", unique_str()).status == Status.Failed
+    assert db.statuses.check(task, variant, group, code, True, "", unique_str()).status == Status.Checked
+    task_status = db.statuses.submit_task(task, variant, group, code, unique_str())
+    assert task_status.status == Status.CheckedSubmitted
+    assert task_status.code == code
+
+
+def test_task_status_maintains_variant_score(db: AppDatabase):
+    (group, variant, task_1) = arrange_task(db)
+    task_2 = unique_int()
+    db.tasks.create(task_2)
+
+    db.statuses.check(task_1, variant, group, unique_str(), False, unique_str(), unique_str())
+    score = db.statuses.get_variant_score(group, variant)
+    assert (score.solved, score.earned) == (0, 0)
+
+    db.statuses.check(task_1, variant, group, unique_str(), True, unique_str(), unique_str())
+    db.statuses.check(task_2, variant, group, unique_str(), True, unique_str(), unique_str())
+    db.statuses.check(task_2, variant, group, unique_str(), False, unique_str(), unique_str())
+    score = db.statuses.get_variant_score(group, variant)
+    assert (score.solved, score.earned) == (2, 2)
+
+    db.statuses.record_achievement(task_1, variant, group, 0)
+    db.statuses.record_achievement(task_1, variant, group, 1)
+    db.statuses.record_achievement(task_1, variant, group, 1)
+    score = db.statuses.get_variant_score(group, variant)
+    assert (score.solved, score.earned) == (2, 3)
+
+    db.statuses.delete_group_task_statuses(group)
+    assert db.statuses.get_variant_score(group, variant) is None
+
+
+def test_task_status_ratings(db: AppDatabase):
+    (group, variant_1, _) = arrange_task(db)
+    variant_2 = unique_int()
+    db.variants.create_by_ids([variant_2])
+    tasks = db.tasks.get_all()
+    for variant in (variant_1, variant_2):
+        for task in tasks:
+            db.statuses.check(task.id, variant, group, unique_str(), True, unique_str(), unique_str())
+    db.statuses.record_achievement(tasks[0].id, variant_2, group, 0)
+    db.statuses.record_achievement(tasks[0].id, variant_2, group, 1)
+
+    rating = [(g.id, variant, earned) for g, variant, earned in db.statuses.get_rating(2 ** 31)]
+    assert rating.index((group, variant_2, len(tasks) + 1)) < rating.index((group, variant_1, len(tasks)))
+
+    title = db.groups.get_by_id(group).title
+    groups = dict((g.id, earned) for g, earned in db.statuses.get_group_rating(dict(), 2 ** 31))
+    assert groups[group] == 2
+    limit = max(variant_1, variant_2)
+    groups = dict((g.id, earned) for g, earned in db.statuses.get_group_rating({title: limit}, 0))
+    assert groups[group] == 1
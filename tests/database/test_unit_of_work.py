@@ -0,0 +1,45 @@
+import pytest
+from tests.utils import arrange_task, unique_str
+
+from webapp.models import Status
+from webapp.repositories import AppDatabase
+
+
+def test_unit_of_work_commits_all_repositories(db: AppDatabase):
+    group, variant, task = arrange_task(db)
+    code = unique_str()
+
+    with db.unit_of_work():
+        message = db.messages.submit_task(task, variant, group, code, unique_str(), None)
+        status = db.statuses.submit_task(task, variant, group, code, unique_str())
+        check = db.checks.record_check(message.id, status.status, None)
+        assert check.id is not None
+
+    assert db.messages.get_by_id(message.id).code == code
+    assert db.statuses.get_task_status(task, variant, group).status == Status.Submitted
+    assert db.checks.get(message.id).id == check.id
+
+
+def test_unit_of_work_rolls_back_on_error(db: AppDatabase):
+    group, variant, task = arrange_task(db)
+    code = unique_str()
+
+    with pytest.raises(RuntimeError):
+        with db.unit_of_work():
+            db.messages.submit_task(task, variant, group, code, unique_str(), None)
+            db.statuses.submit_task(task, variant, group, code, unique_str())
+            raise RuntimeError()
+
+    assert not db.messages.get(task, variant, group)
+    assert db.statuses.get_task_status(task, variant, group) is None
+
+
+def test_unit_of_work_sees_own_writes(db: AppDatabase):
+    group, variant, task = arrange_task(db)
+
+    with db.unit_of_work():
+        db.statuses.submit_task(task, variant, group, unique_str(), unique_str())
+        status = db.statuses.check(task, variant, group, unique_str(), True, None, unique_str())
+        assert status.status == Status.Checked
+        status = db.statuses.check(task, variant, group, unique_str(), False, None, unique_str())
+        assert status.status == Status.CheckedFailed
@@ -0,0 +1,18 @@
+from tests.utils import unique_int, unique_str
+
+from webapp.repositories import AppDatabase
+
+
+def test_verdict_store_and_get(db: AppDatabase):
+    group_title = unique_str()
+    code_hash = unique_str()
+    task = unique_int()
+
+    assert db.verdicts.get(group_title, task, 0, code_hash, "1") is None
+    db.verdicts.store(group_title, task, 0, code_hash, "1", True, "")
+    db.verdicts.store(group_title, task, 0, code_hash, "1", False, "ignored")
+
+    verdict = db.verdicts.get(group_title, task, 0, code_hash, "1")
+    assert verdict.ok
+    assert verdict.output == ""
+    assert db.verdicts.get(group_title, task, 0, code_hash, "2") is None
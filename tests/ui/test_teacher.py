@@ -1,5 +1,6 @@
 from tests.utils import arrange_task, mode, teacher_login, unique_str
 
+from flask import Flask
 from flask.testing import FlaskClient
 
 from webapp.repositories import AppDatabase
@@ -97,3 +98,23 @@ def test_invalid_page_redirect(db: AppDatabase, client: FlaskClient):
     gid, vid, tid = arrange_task(db)
     response = client.get(f"/teacher/submissions/group/{gid}/variant/{vid}/task/{tid}/1")
     assert response.status_code == 302
+
+
+def test_quarantined_messages_are_requeued(queue: AppDatabase, app: Flask, client: FlaskClient):
+    app.config["CONNECTION_STRING"] = app.config["QUEUE_CONNECTION_STRING"]
+    teacher_login(queue, client)
+    gid, vid, tid = arrange_task(queue)
+    message = queue.messages.submit_task(tid, vid, gid, "main = lambda: 42", "0.0.0.0", None)
+    queue.messages.claim_pending("worker", 10, 60)
+    queue.messages.quarantine(message.id, "worker", "Checker has crashed")
+
+    response = client.get("/teacher")
+    assert "Checker has crashed" in response.get_data(as_text=True)
+    assert f"<td>{queue.groups.get_by_id(gid).title}</td>" in response.get_data(as_text=True)
+
+    response = client.post("/teacher/messages/requeue", follow_redirects=True)
+    assert response.request.path == "/teacher"
+    assert "Checker has crashed" not in response.get_data(as_text=True)
+    message = queue.messages.get_by_id(message.id)
+    assert not message.quarantined
+    assert message.attempts == 0
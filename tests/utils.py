@@ -20,8 +20,8 @@ def unique_str() -> str:
 
 
 def unique_int() -> int:
-    unique_id = uuid.uuid4().node
-    return int(unique_id)
+    unique_id = uuid.uuid4().int
+    return int(unique_id % 2 ** 31)
 
 
 def timeout_assert(condition: Callable[[], bool], timeout: int = 20):
@@ -25,12 +25,14 @@ def run_migrations_offline():
 
 
 def run_migrations_online():
-    section = config.get_section(config.config_ini_section)
-    connectable = engine_from_config(
-        section,
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    connectable = config.attributes.get("connection")
+    if connectable is None:
+        section = config.get_section(config.config_ini_section)
+        connectable = engine_from_config(
+            section,
+            prefix="sqlalchemy.",
+            poolclass=pool.NullPool,
+        )
 
     with connectable.connect() as connection:
         context.configure(
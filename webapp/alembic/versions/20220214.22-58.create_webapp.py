@@ -43,7 +43,7 @@ def upgrade():
 
 
 def downgrade():
+    op.drop_table('task_statuses')
     op.drop_table('groups')
     op.drop_table('tasks')
     op.drop_table('variants')
-    op.drop_table('task_statuses')
@@ -29,4 +29,5 @@ def upgrade():
 
 
 def downgrade():
-    op.drop_column("messages", "student")
+    with op.batch_alter_table("messages") as bop:
+        bop.drop_column("student")
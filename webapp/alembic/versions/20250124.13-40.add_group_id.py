@@ -25,5 +25,6 @@ def upgrade():
 
 
 def downgrade():
-    op.drop_column('students', 'group')
+    with op.batch_alter_table('students') as bop:
+        bop.drop_column('group')
     op.add_column('students', sa.Column('group', sa.String, nullable=True))
@@ -0,0 +1,45 @@
+"""add_indexes
+
+Revision ID: 79d43cc79a91
+Revises: 3782564289c1
+Create Date: 2026-10-18 12:30:12.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '79d43cc79a91'
+down_revision = '3782564289c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name in ("sqlite", "postgresql"):
+        op.create_index(
+            "ix_messages_pending",
+            "messages",
+            ["time"],
+            sqlite_where=sa.text("processed = 0"),
+            postgresql_where=sa.text("NOT processed"),
+        )
+    else:
+        op.create_index("ix_messages_pending", "messages", ["processed", "time"])
+    op.create_index("ix_messages_student", "messages", ["student"])
+    op.create_index("ix_messages_session_id", "messages", ["session_id"])
+    op.create_index("ix_messages_slot", "messages", ["group", "variant", "task", "time"])
+    op.create_index("ix_message_checks_message", "message_checks", ["message"])
+    op.create_index("ix_task_statuses_group", "task_statuses", ["group"])
+    op.create_index("ix_students_email", "students", ["email"])
+
+
+def downgrade():
+    op.drop_index("ix_students_email", "students")
+    op.drop_index("ix_task_statuses_group", "task_statuses")
+    op.drop_index("ix_message_checks_message", "message_checks")
+    op.drop_index("ix_messages_slot", "messages")
+    op.drop_index("ix_messages_session_id", "messages")
+    op.drop_index("ix_messages_student", "messages")
+    op.drop_index("ix_messages_pending", "messages")
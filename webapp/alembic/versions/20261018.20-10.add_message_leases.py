@@ -0,0 +1,29 @@
+"""add_message_leases
+
+Revision ID: 5e0d7a3b91c4
+Revises: 79d43cc79a91
+Create Date: 2026-10-18 20:10:37.502114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0d7a3b91c4'
+down_revision = '79d43cc79a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("messages", sa.Column("claimed_by", sa.String, nullable=True))
+    op.add_column("messages", sa.Column("lease_expires", sa.DateTime, nullable=True))
+    op.add_column("messages", sa.Column("attempts", sa.Integer, nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("messages") as bop:
+        bop.drop_column("attempts")
+        bop.drop_column("lease_expires")
+        bop.drop_column("claimed_by")
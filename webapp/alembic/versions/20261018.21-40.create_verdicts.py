@@ -0,0 +1,34 @@
+"""create_verdicts
+
+Revision ID: a41f6c2e8d07
+Revises: 5e0d7a3b91c4
+Create Date: 2026-10-18 21:40:12.884310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f6c2e8d07'
+down_revision = '5e0d7a3b91c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "verdicts",
+        sa.Column("group_title", sa.String, primary_key=True, nullable=False),
+        sa.Column("task", sa.Integer, primary_key=True, nullable=False),
+        sa.Column("variant", sa.Integer, primary_key=True, nullable=False),
+        sa.Column("code_hash", sa.String, primary_key=True, nullable=False),
+        sa.Column("core_version", sa.String, primary_key=True, nullable=False),
+        sa.Column("ok", sa.Boolean, nullable=False),
+        sa.Column("output", sa.String, nullable=True),
+        sa.Column("time", sa.DateTime, nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("verdicts")
@@ -0,0 +1,27 @@
+"""add_message_quarantine
+
+Revision ID: c83f1d9e5a62
+Revises: a41f6c2e8d07
+Create Date: 2026-10-18 22:30:14.183520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c83f1d9e5a62'
+down_revision = 'a41f6c2e8d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("messages", sa.Column("quarantined", sa.Boolean, nullable=False, server_default=sa.false()))
+    op.add_column("messages", sa.Column("error", sa.String, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("messages") as bop:
+        bop.drop_column("error")
+        bop.drop_column("quarantined")
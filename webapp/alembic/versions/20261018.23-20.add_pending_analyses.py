@@ -0,0 +1,39 @@
+"""add_pending_analyses
+
+Revision ID: 0b7e42d95f18
+Revises: c83f1d9e5a62
+Create Date: 2026-10-18 23:20:51.904317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e42d95f18'
+down_revision = 'c83f1d9e5a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "message_checks",
+        sa.Column("analysis_pending", sa.Boolean, nullable=False, server_default=sa.false()),
+    )
+    if op.get_bind().dialect.name in ("sqlite", "postgresql"):
+        op.create_index(
+            "ix_message_checks_analysis_pending",
+            "message_checks",
+            ["id"],
+            sqlite_where=sa.text("analysis_pending = 1"),
+            postgresql_where=sa.text("analysis_pending"),
+        )
+    else:
+        op.create_index("ix_message_checks_analysis_pending", "message_checks", ["analysis_pending", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_message_checks_analysis_pending", "message_checks")
+    with op.batch_alter_table("message_checks") as bop:
+        bop.drop_column("analysis_pending")
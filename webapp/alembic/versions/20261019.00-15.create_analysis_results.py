@@ -0,0 +1,28 @@
+"""create_analysis_results
+
+Revision ID: 6d2a90c4e7b3
+Revises: 0b7e42d95f18
+Create Date: 2026-10-19 00:15:26.730148
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d2a90c4e7b3'
+down_revision = '0b7e42d95f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "analysis_results",
+        sa.Column("check", sa.Integer, sa.ForeignKey("message_checks.id"), primary_key=True, nullable=False),
+        sa.Column("achievement", sa.Integer, nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("analysis_results")
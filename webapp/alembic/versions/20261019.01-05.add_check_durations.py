@@ -0,0 +1,31 @@
+"""add_check_durations
+
+Revision ID: e5f81c3a0d49
+Revises: 6d2a90c4e7b3
+Create Date: 2026-10-19 01:05:43.216870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f81c3a0d49'
+down_revision = '6d2a90c4e7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("message_checks", sa.Column("lookup_duration", sa.Float, nullable=True))
+    op.add_column("message_checks", sa.Column("check_duration", sa.Float, nullable=True))
+    op.add_column("message_checks", sa.Column("write_duration", sa.Float, nullable=True))
+    op.add_column("message_checks", sa.Column("analysis_duration", sa.Float, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("message_checks") as bop:
+        bop.drop_column("analysis_duration")
+        bop.drop_column("write_duration")
+        bop.drop_column("check_duration")
+        bop.drop_column("lookup_duration")
@@ -0,0 +1,46 @@
+"""create_variant_scores
+
+Revision ID: 91c5e3f7a2d0
+Revises: e5f81c3a0d49
+Create Date: 2026-10-19 02:10:08.557341
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '91c5e3f7a2d0'
+down_revision = 'e5f81c3a0d49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    scores = op.create_table(
+        "variant_scores",
+        sa.Column("group", sa.Integer, sa.ForeignKey("groups.id"), primary_key=True, nullable=False),
+        sa.Column("variant", sa.Integer, sa.ForeignKey("variants.id"), primary_key=True, nullable=False),
+        sa.Column("solved", sa.Integer, nullable=False),
+        sa.Column("earned", sa.Integer, nullable=False),
+    )
+    op.create_index("ix_variant_scores_solved_earned", "variant_scores", ["solved", "earned"])
+    rows = op.get_bind().execute(sa.text(
+        'SELECT "group", variant, achievements FROM task_statuses WHERE status IN (2, 5, 6)'
+    )).all()
+    totals = dict()
+    for group, variant, achievements in rows:
+        solved, earned = totals.get((group, variant), (0, 0))
+        totals[(group, variant)] = (solved + 1, earned + max(len(json.loads(achievements or "[]")), 1))
+    if totals:
+        op.bulk_insert(scores, [
+            dict(group=group, variant=variant, solved=solved, earned=earned)
+            for (group, variant), (solved, earned) in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_index("ix_variant_scores_solved_earned", "variant_scores")
+    op.drop_table("variant_scores")
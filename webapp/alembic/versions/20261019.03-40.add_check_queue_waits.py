@@ -0,0 +1,27 @@
+"""add_check_queue_waits
+
+Revision ID: 4b8d2e6f1a73
+Revises: 91c5e3f7a2d0
+Create Date: 2026-10-19 03:40:18.402561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8d2e6f1a73'
+down_revision = '91c5e3f7a2d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("message_checks", sa.Column("priority", sa.String, nullable=True))
+    op.add_column("message_checks", sa.Column("queue_duration", sa.Float, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("message_checks") as bop:
+        bop.drop_column("queue_duration")
+        bop.drop_column("priority")
@@ -0,0 +1,25 @@
+"""add_check_analysis_tasks
+
+Revision ID: c7a1d93e5b24
+Revises: 4b8d2e6f1a73
+Create Date: 2026-10-19 04:15:52.718304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a1d93e5b24'
+down_revision = '4b8d2e6f1a73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("message_checks", sa.Column("analysis_task", sa.Integer, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("message_checks") as bop:
+        bop.drop_column("analysis_task")
@@ -12,8 +12,9 @@ import webapp.views.api as api
 import webapp.views.student as student
 import webapp.views.teacher as teacher
 import webapp.worker as worker
-from webapp.commands import AnalyzeCmd, CmdManager, SeedCmd, migrate
+from webapp.commands import AnalyzeCmd, CmdManager, RequeueCmd, SeedCmd, migrate
 from webapp.dto import AppConfig
+from webapp.metrics import instrument_app
 from webapp.utils import load_config_files
 
 
@@ -33,6 +34,7 @@ def configure_app(directory: str) -> Flask:
     app.register_blueprint(student.blueprint)
     app.register_blueprint(teacher.blueprint)
     app.register_blueprint(api.blueprint)
+    instrument_app(app)
     JWTManager(app)
     logging.basicConfig(level=logging.DEBUG)
     migrate(config["CONNECTION_STRING"])
@@ -42,6 +44,7 @@ def configure_app(directory: str) -> Flask:
 def configure_background_services(app: Flask) -> Flask:
     config = AppConfig(app.config)
     app.config["WORKER_PID"] = worker.start_background_worker(config)
+    app.config["ANALYSIS_PID"] = worker.start_analysis_worker(config)
     app.config["MAILBOX_PID"] = mailbox.start_background_worker(config)
     return app
 
@@ -57,5 +60,5 @@ def create_app() -> Flask:
 
 
 if __name__ == "__main__":
-    cmd = CmdManager(config(), [SeedCmd, AnalyzeCmd])
+    cmd = CmdManager(config(), [SeedCmd, AnalyzeCmd, RequeueCmd])
     cmd.run()
@@ -10,7 +10,7 @@ from webapp.repositories import AppDatabase
 from webapp.utils import load_config_files
 
 
-def migrate(connection_string: str):
+def migrate(connection_string: str, revision: str = "head"):
     base = os.path.dirname(os.path.abspath(__file__))
     ini = os.path.join(base, "alembic.ini")
     script = os.path.join(base, "alembic")
@@ -18,7 +18,7 @@ def migrate(connection_string: str):
     config.set_main_option("sqlalchemy.url", connection_string)
     if script is not None:
         config.set_main_option("script_location", script)
-    command.upgrade(config, "head")
+    command.upgrade(config, revision)
 
 
 class CmdManager:
@@ -55,7 +55,7 @@ class SeedCmd:
         print(f'Seeding db {config.connection_string} using core {config.core_path}...')
         groups, tasks, _ = worker.load_config(config.core_path)
         migrate(config.connection_string)
-        db = AppDatabase(lambda: config.connection_string)
+        db = AppDatabase(lambda: config.connection_string, lambda: config.database_options)
         db.groups.delete_all()
         db.tasks.delete_all()
         db.variants.delete_all()
@@ -73,27 +73,24 @@ class AnalyzeCmd:
 
     def run(self, dir: str):
         config = AppConfigManager(lambda: load_config_files(dir)).config
-        db = AppDatabase(lambda: config.connection_string)
-        db.statuses.clear_achievements()
-        checked = db.checks.checked()
-        print(f'Cleared achievements, analyzing {len(checked)} checked programs...')
-        for check in checked:
-            message = db.messages.get_by_id(check.message)
-            analyzed, order = worker.analyze_solution(
-                analytics_path=config.analytics_path,
-                code=message.code,
-                task=message.task,
-            )
-            if not analyzed:
-                continue
-            db.checks.record_achievement(
-                check=check.id,
-                achievement=order
-            )
-            db.statuses.record_achievement(
-                task=message.task,
-                variant=message.variant,
-                group=message.group,
-                achievement=order,
-            )
-        print(f'Done analyzing {len(checked)} programs.')
+        db = AppDatabase(lambda: config.connection_string, lambda: config.database_options)
+        concurrency = config.analysis_concurrency or os.cpu_count()
+        executor = worker.create_pool(concurrency)
+        print(f'Analyzing checked programs using {concurrency} processes...')
+        try:
+            analyzed = worker.reanalyze(config, db, executor, concurrency * 2)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        print(f'Done analyzing {analyzed} programs.')
+
+
+class RequeueCmd:
+    def __init__(self):
+        self.command = "--requeue"
+        self.help = "requeues messages quarantined after repeated check failures"
+
+    def run(self, dir: str):
+        config = AppConfigManager(lambda: load_config_files(dir)).config
+        db = AppDatabase(lambda: config.connection_string, lambda: config.database_options)
+        print(f'Requeued {db.messages.requeue_quarantined()} quarantined messages.')
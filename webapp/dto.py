@@ -10,8 +10,36 @@ class AppConfig:
         self.analytics_path: str = config["ANALYTICS_PATH"]
         self.api_token: str = config["API_TOKEN"]
         self.connection_string: str = config["CONNECTION_STRING"]
+        self.pool_size: int = config["POOL_SIZE"]
+        self.pool_max_overflow: int = config["POOL_MAX_OVERFLOW"]
+        self.pool_recycle: int = config["POOL_RECYCLE"]
+        self.sqlite_journal_mode: str | None = config["SQLITE_JOURNAL_MODE"]
+        self.sqlite_synchronous: str | None = config["SQLITE_SYNCHRONOUS"]
+        self.sqlite_busy_timeout: int = config["SQLITE_BUSY_TIMEOUT"]
+        self.lock_retries: int = config["LOCK_RETRIES"]
+        self.lock_backoff: float = config["LOCK_BACKOFF"]
         self.task_base_path: str = config["TASK_BASE_PATH"]
         self.no_background_worker: bool = config["DISABLE_BACKGROUND_WORKER"]
+        self.check_concurrency: int = config["CHECK_CONCURRENCY"]
+        self.coalesce_submissions: bool = config["COALESCE_SUBMISSIONS"]
+        self.scheduler_weights: dict[str, float] = config["SCHEDULER_WEIGHTS"]
+        self.check_timeout: float | None = config["CHECK_TIMEOUT"]
+        self.check_cpu_limit: int | None = config["CHECK_CPU_LIMIT"]
+        self.check_memory_limit: int | None = config["CHECK_MEMORY_LIMIT"]
+        self.check_zygote_recycle: int = config["CHECK_ZYGOTE_RECYCLE"]
+        self.verdict_cache: bool = config["VERDICT_CACHE"]
+        self.worker_wakeup_socket: str | None = config["WORKER_WAKEUP_SOCKET"]
+        self.worker_poll_interval: float = config["WORKER_POLL_INTERVAL"]
+        self.worker_batch_size: int = config["WORKER_BATCH_SIZE"]
+        self.worker_lease: float = config["WORKER_LEASE_SECONDS"]
+        self.worker_max_attempts: int = config["WORKER_MAX_ATTEMPTS"]
+        self.worker_retry_backoff: float = config["WORKER_RETRY_BACKOFF"]
+        self.analysis_poll_interval: float = config["ANALYSIS_POLL_INTERVAL"]
+        self.analysis_batch_size: int = config["ANALYSIS_BATCH_SIZE"]
+        self.analysis_concurrency: int = config["ANALYSIS_CONCURRENCY"]
+        self.metrics_window: int = config["METRICS_WINDOW"]
+        self.leader_lock_directory: str = config["LEADER_LOCK_DIRECTORY"]
+        self.leader_retry_interval: float = config["LEADER_RETRY_INTERVAL"]
         self.final_tasks: dict[str, list[int]] = config["FINAL_TASKS"]
         self.final_variants: int = config["FINAL_VARIANTS"]
         self.clearable_database: bool = config["CLEARABLE_DATABASE"]
@@ -32,6 +60,20 @@ class AppConfig:
     def registration(self) -> bool:
         return self.enable_registration
 
+    @property
+    def database_options(self) -> dict:
+        return dict(
+            pool_size=self.pool_size,
+            max_overflow=self.pool_max_overflow,
+            pool_recycle=self.pool_recycle,
+            journal_mode=self.sqlite_journal_mode,
+            synchronous=self.sqlite_synchronous,
+            busy_timeout=self.sqlite_busy_timeout,
+            lock_retries=self.lock_retries,
+            lock_backoff=self.lock_backoff,
+            wakeup_socket=self.worker_wakeup_socket,
+        )
+
 
 class ExternalTaskDto:
     def __init__(self, group: int, group_title: str, task: int, variant: int, active: bool):
@@ -90,7 +132,8 @@ class TaskStatusDto:
         self.external = external
         self.status = Status.NotSubmitted if status is None else status.status
         self.checked = self.status in [Status.Checked, Status.CheckedSubmitted, Status.CheckedFailed]
-        self.error_message = status.output if self.status in [Status.Failed, Status.CheckedFailed] else None
+        failed = [Status.Failed, Status.CheckedFailed, Status.TimedOut]
+        self.error_message = status.output if self.status in failed else None
         self.readonly = config.readonly
         self.achievements = self.map_achievements(status, achievements)
 
@@ -117,6 +160,8 @@ class TaskStatusDto:
             Status.CheckedSubmitted: "#e3ffee",
             Status.CheckedFailed: "#e3ffee",
             Status.Failed: "#ffe3ee",
+            Status.TimedOut: "#ffe3ee",
+            Status.Superseded: "inherit",
             Status.NotSubmitted: "inherit",
         })
 
@@ -128,6 +173,8 @@ class TaskStatusDto:
             Status.CheckedSubmitted: "Зачтено. Отправлено повторно",
             Status.CheckedFailed: "Зачтено. Ошибка при повторной отправке!",
             Status.Failed: "Ошибка!",
+            Status.TimedOut: "Превышено время проверки!",
+            Status.Superseded: "Заменено более поздней отправкой",
             Status.NotSubmitted: "Не отправлено",
         })
 
@@ -139,6 +186,8 @@ class TaskStatusDto:
             Status.CheckedSubmitted: "+",
             Status.CheckedFailed: "+",
             Status.Failed: "x",
+            Status.TimedOut: "x",
+            Status.Superseded: "-",
             Status.NotSubmitted: "-",
         })
 
@@ -150,6 +199,8 @@ class TaskStatusDto:
             Status.CheckedSubmitted: "success",
             Status.CheckedFailed: "success",
             Status.Failed: "danger",
+            Status.TimedOut: "danger",
+            Status.Superseded: "secondary",
             Status.NotSubmitted: "secondary",
         })
 
@@ -163,6 +214,8 @@ class TaskStatusDto:
         return self.achievements and self.map_status({
             Status.Submitted: False,
             Status.Failed: False,
+            Status.TimedOut: False,
+            Status.Superseded: False,
             Status.NotSubmitted: False,
             Status.Checked: True,
             Status.CheckedSubmitted: True,
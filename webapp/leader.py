@@ -0,0 +1,82 @@
+import os
+import time
+import zlib
+
+import sqlalchemy as sa
+
+from webapp.models import detach_connection
+from webapp.utils import get_exception_info
+
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class LeaderLock:
+    def __init__(self, name: str, engine: sa.Engine, directory: str):
+        self.engine = engine
+        self.key = zlib.crc32(name.encode())
+        digest = "%08x" % zlib.crc32(str(engine.url).encode())
+        self.path = os.path.join(directory, f"web-app-{name}-{digest}.lock")
+        self.connection = None
+        self.file = None
+
+    def acquire(self) -> bool:
+        if self.engine.dialect.name == "postgresql":
+            if self.connection is None:
+                self.connection = detach_connection(self.engine)
+            return bool(self.connection.scalar(sa.text("SELECT pg_try_advisory_lock(:key)"), dict(key=self.key)))
+        if fcntl is None:
+            return True
+        if self.file is None:
+            self.file = open(self.path, "a")
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def held(self) -> bool:
+        if self.engine.dialect.name != "postgresql":
+            return True
+        if self.connection is None:
+            return False
+        try:
+            self.connection.execute(sa.text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def release(self):
+        if self.connection is not None:
+            try:
+                self.connection.execute(sa.text("SELECT pg_advisory_unlock_all()"))
+            except Exception:
+                pass
+            self.connection.close()
+            self.connection = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def wait_for_leadership(lock: LeaderLock, interval: float):
+    while True:
+        try:
+            if lock.acquire():
+                return
+        except BaseException:
+            exception = get_exception_info()
+            print(f"Error occured while electing the leader: {exception}")
+            lock.release()
+        time.sleep(interval)
+
+
+def keep_leadership(lock: LeaderLock, interval: float):
+    if lock.held():
+        return
+    print(f"Process {os.getpid()} has lost the leadership, waiting for a new election...")
+    lock.release()
+    wait_for_leadership(lock, interval)
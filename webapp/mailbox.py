@@ -3,10 +3,12 @@ import email.header
 import email.message
 import email.utils
 import imaplib
+import os
 import time
 from multiprocessing import Process
 
 from webapp.dto import AppConfig
+from webapp.leader import LeaderLock, keep_leadership, wait_for_leadership
 from webapp.repositories import AppDatabase
 from webapp.utils import get_exception_info
 
@@ -38,10 +40,21 @@ def get_all_senders(login: str, password: str):
         return messages
 
 
-def background_worker(login: str, password: str, connection: str):
+def background_worker(
+    login: str,
+    password: str,
+    connection: str,
+    options: dict,
+    lock_directory: str,
+    retry_interval: float,
+):
     print(f"Starting background worker for IMAP {login} and database: {connection}")
-    db = AppDatabase(lambda: connection)
+    db = AppDatabase(lambda: connection, lambda: options)
+    lock = LeaderLock("mailbox", db.db.engine, lock_directory)
+    wait_for_leadership(lock, retry_interval)
+    print(f"Mailbox worker {os.getpid()} is the leader now")
     while True:
+        keep_leadership(lock, retry_interval)
         try:
             senders = get_all_senders(login, password)
             length = len(senders)
@@ -69,6 +82,9 @@ def start_background_worker(config: AppConfig):
         config.imap_login,
         config.imap_password,
         config.connection_string,
+        config.database_options,
+        config.leader_lock_directory,
+        config.leader_retry_interval,
     ))
     try:
         process.start()
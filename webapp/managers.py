@@ -1,9 +1,10 @@
 import csv
+import datetime
 import io
 import json
 import os
 import random
-from itertools import groupby
+from collections import Counter
 from typing import Callable
 
 import bcrypt
@@ -19,6 +20,7 @@ from webapp.dto import (
     TaskStatusDto,
     VariantDto
 )
+from webapp.metrics import format_metric, summarize
 from webapp.models import (
     FinalSeed,
     Group,
@@ -124,58 +126,25 @@ class AchievementManager:
 
 
 class RatingManager:
-    def __init__(
-        self,
-        config: AppConfigManager,
-        statuses: TaskStatusRepository,
-        achievements: AchievementManager,
-        tasks: TaskRepository,
-    ):
+    def __init__(self, config: AppConfigManager, statuses: TaskStatusRepository):
         self.config = config
         self.statuses = statuses
-        self.achievements = achievements
-        self.tasks = tasks
 
     @ttl_cache(duration=30, maxsize=1)
     def get_group_rating(self) -> dict[int, list[GroupInRatingDto]]:
-        def key(info: tuple[Group, int]):
-            group, _ = info
-            return group.id
-
-        config = self.config.config.groups
-        rating = self.statuses.get_group_rating()
         places: dict[int, list[GroupInRatingDto]] = dict()
-        for _, pairs in groupby(sorted(rating, key=key), key):
-            pairs = list(pairs)
-            group, _ = pairs[0]
-            earned = sum(1 for group, var in pairs if var is not None and var < config.get(group.title, 40))
+        for group, earned in self.statuses.get_group_rating(self.config.config.groups, 40):
             places.setdefault(earned, [])
             places[earned].append(GroupInRatingDto(group, earned))
-        return dict(sorted(places.items(), reverse=True))
+        return places
 
     @ttl_cache(duration=30, maxsize=1)
     def get_rating(self) -> dict[int, list[StudentInRatingDto]]:
-        def key(info: tuple[Group, TaskStatus]):
-            _, status = info
-            return status.group, status.variant
-
-        achievements = self.achievements.read_achievements()
-        statuses = self.statuses.get_rating()
-        tasks = self.tasks.get_all()
         places: dict[int, list[StudentInRatingDto]] = dict()
-        for _, pairs in groupby(sorted(statuses, key=key), key):
-            pairs = list(pairs)
-            group, status = pairs[0]
-            tids = [status.task for _, status in pairs]
-            if any(task.id not in tids for task in tasks):
-                continue
-            active = sum(len(status.achievements or [0]) for _, status in pairs if str(status.task) in achievements)
-            inactive = sum(1 for _, status in pairs if str(status.task) not in achievements)
-            earned = active + inactive
+        for group, variant, earned in self.statuses.get_rating(self.config.config.places_in_rating):
             places.setdefault(earned, [])
-            places[earned].append(StudentInRatingDto(group, status.variant, earned))
-        ordered = sorted(places.items(), reverse=True)
-        return dict(ordered[0:self.config.config.places_in_rating])
+            places[earned].append(StudentInRatingDto(group, variant, earned))
+        return places
 
 
 class StatusManager:
@@ -535,3 +504,58 @@ class ExportManager:
         bom = u"\uFEFF"
         value = bom + si.getvalue()
         return value
+
+
+class MetricsManager:
+    def __init__(self, config: AppConfigManager, messages: MessageRepository, checks: MessageCheckRepository):
+        self.config = config
+        self.messages = messages
+        self.checks = checks
+
+    def export(self) -> str:
+        now = datetime.datetime.now()
+        pending, quarantined, oldest = self.messages.get_queue_stats()
+        age = (now - oldest).total_seconds() if oldest else 0.0
+        timings = self.checks.get_recent_timings(self.config.config.metrics_window)
+        counts = Counter(row.status for row in timings)
+        latencies = [(row.checked - row.sent).total_seconds() for row in timings]
+        throughput = 0.0
+        if len(timings) > 1:
+            span = (timings[0].checked - timings[-1].checked).total_seconds()
+            throughput = len(timings) / span if span > 0 else 0.0
+        return "".join([
+            format_metric("dta_queue_depth", "gauge", "Messages waiting for a check.", [
+                ("", dict(), pending),
+            ]),
+            format_metric("dta_queue_quarantined", "gauge", "Messages quarantined after repeated failures.", [
+                ("", dict(), quarantined),
+            ]),
+            format_metric("dta_queue_oldest_pending_seconds", "gauge", "Age of the oldest pending message.", [
+                ("", dict(), age),
+            ]),
+            format_metric("dta_recent_checks", "gauge", "Recent checks by status.", [
+                ("", dict(status=Status(status).name), count) for status, count in sorted(counts.items())
+            ]),
+            format_metric("dta_check_throughput", "gauge", "Checks per second over the recent checks.", [
+                ("", dict(), throughput),
+            ]),
+            format_metric("dta_check_latency_seconds", "summary", "Time from submission to verdict.",
+                          summarize(latencies, dict())),
+            format_metric("dta_queue_wait_seconds", "summary", "Time from submission to claim by priority class.", [
+                sample
+                for priority in sorted({row.priority for row in timings if row.priority is not None})
+                for sample in summarize(
+                    [row.queue_duration for row in timings if row.priority == priority],
+                    dict(priority=priority),
+                )
+            ]),
+            format_metric("dta_check_stage_seconds", "summary", "Time spent in each worker stage.", [
+                sample
+                for stage in ("lookup", "check", "write", "analysis")
+                for sample in self.__summarize_stage(timings, stage)
+            ]),
+        ])
+
+    def __summarize_stage(self, timings: list[tuple], stage: str):
+        durations = [getattr(row, f"{stage}_duration") for row in timings]
+        return summarize([duration for duration in durations if duration is not None], dict(stage=stage))
@@ -0,0 +1,166 @@
+import bisect
+import math
+import threading
+import time
+
+import sqlalchemy as sa
+
+from flask import Flask, g, request
+
+
+QUANTILES = (0.5, 0.9, 0.99)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def format_metric(name: str, kind: str, help: str, samples: list[tuple[str, dict[str, str], float]]) -> str:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def summarize(values: list[float], labels: dict[str, str]) -> list[tuple[str, dict[str, str], float]]:
+    samples = []
+    if values:
+        samples = [("", dict(labels, quantile=str(q)), quantile(values, q)) for q in QUANTILES]
+    samples.append(("_sum", labels, sum(values)))
+    samples.append(("_count", labels, len(values)))
+    return samples
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple[str, ...], float] = dict()
+        self.lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self.lock:
+            values = list(self.values.items())
+        return [("", dict(zip(self.labels, key)), value) for key, value in sorted(values)]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.values: dict[tuple[str, ...], tuple[list[int], list[float]]] = dict()
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self.lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self.values.items()]
+        samples = []
+        for key, counts, total in sorted(values):
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else str(bound)
+                samples.append(("_bucket", dict(labels, le=le), cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Histogram:
+        metric = Histogram(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(
+            format_metric(metric.name, metric.kind, metric.help, metric.samples())
+            for metric in self.metrics
+        )
+
+
+registry = Registry()
+http_requests = registry.histogram(
+    "dta_http_request_seconds",
+    "Time spent serving HTTP requests.",
+    ("blueprint", "endpoint", "method", "status"),
+)
+db_queries = registry.histogram("dta_db_query_seconds", "Time spent executing SQL statements.", ("operation",))
+db_sessions = registry.counter("dta_db_sessions_total", "Opened database sessions.", ("mode",))
+cache_requests = registry.counter("dta_cache_requests_total", "Calls of cached functions.", ("function",))
+cache_misses = registry.counter("dta_cache_misses_total", "Cached function calls that missed.", ("function",))
+
+
+def before_request():
+    g.metrics_started = time.perf_counter()
+
+
+def after_request(response):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or ""
+        http_requests.observe(elapsed, request.blueprint or "", endpoint, request.method, str(response.status_code))
+    return response
+
+
+def instrument_app(app: Flask):
+    app.before_request(before_request)
+    app.after_request(after_request)
+
+
+def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    connection.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    started = connection.info["metrics_started"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    db_queries.observe(time.perf_counter() - started, operation)
+
+
+def handle_error(context):
+    if context.connection is not None and context.connection.info.get("metrics_started"):
+        context.connection.info["metrics_started"].pop()
+
+
+def instrument_engine(engine: sa.Engine):
+    sa.event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    sa.event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    sa.event.listen(engine, "handle_error", handle_error)
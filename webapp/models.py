@@ -1,10 +1,14 @@
 import enum
 import json
+import os
 
 import sqlalchemy as sa
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from webapp.metrics import instrument_engine
+
 
 class IntEnum(sa.TypeDecorator):
     impl = sa.Integer
@@ -47,6 +51,8 @@ class Status(enum.IntEnum):
     NotSubmitted = 4
     CheckedSubmitted = 5
     CheckedFailed = 6
+    TimedOut = 7
+    Superseded = 8
 
 
 class TypeOfTask(enum.IntEnum):
@@ -57,13 +63,99 @@ class TypeOfTask(enum.IntEnum):
 Base = declarative_base()
 
 
-def create_session_maker(connection_string: str) -> sessionmaker:
-    engine = create_engine(connection_string)
+session_makers: dict[str, sessionmaker] = dict()
+
+
+class LockStats:
+    def __init__(self):
+        self.retries = 0
+        self.failures = 0
+
+
+def on_connect(journal_mode: str | None, synchronous: str | None, busy_timeout: int):
+    def listener(connection, _):
+        connection.isolation_level = None
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+        if journal_mode:
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        if synchronous:
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.close()
+    return listener
+
+
+def on_begin(connection):
+    mode = connection.get_execution_options().get("sqlite_begin", "")
+    connection.exec_driver_sql(f"BEGIN {mode}")
+
+
+def create_engine_for(
+    connection_string: str,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_recycle: int = -1,
+    journal_mode: str | None = None,
+    synchronous: str | None = None,
+    busy_timeout: int = 5000,
+) -> Engine:
+    url = make_url(connection_string)
+    if url.get_backend_name() == "sqlite":
+        engine = create_engine(url)
+        event.listen(engine, "connect", on_connect(journal_mode, synchronous, busy_timeout))
+        event.listen(engine, "begin", on_begin)
+        instrument_engine(engine)
+        return engine
+    engine = create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+    )
+    instrument_engine(engine)
+    return engine
+
+
+def detach_connection(engine: sa.Engine) -> sa.Connection:
+    connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    connection.detach()
+    return connection
+
+
+def create_session_maker(
+    connection_string: str,
+    lock_retries: int = 0,
+    lock_backoff: float = 0.0,
+    wakeup_socket: str | None = None,
+    **options,
+) -> sessionmaker:
+    factory = session_makers.get(connection_string)
+    if factory is not None:
+        return factory
+    engine = create_engine_for(connection_string, **options)
     Base.metadata.create_all(engine)
-    factory = sessionmaker(bind=engine)
+    info = dict(
+        lock_retries=lock_retries,
+        lock_backoff=lock_backoff,
+        lock_stats=LockStats(),
+        wakeup_socket=wakeup_socket,
+    )
+    factory = sessionmaker(bind=engine, expire_on_commit=False, info=info)
+    session_makers[connection_string] = factory
     return factory
 
 
+def dispose_session_makers(close: bool = True):
+    for factory in session_makers.values():
+        factory.kw["bind"].dispose(close=close)
+    session_makers.clear()
+
+
+os.register_at_fork(after_in_child=lambda: dispose_session_makers(close=False))
+
+
 class Group(Base):
     __tablename__ = "groups"
     id = sa.Column("id", sa.Integer, primary_key=True, nullable=False, autoincrement=True)
@@ -94,6 +186,20 @@ class TaskStatus(Base):
     output = sa.Column("output", sa.String, nullable=True)
     status = sa.Column("status", IntEnum(Status), nullable=False)
     achievements = sa.Column("achievements", JsonArray, nullable=True)
+    __table_args__ = (
+        sa.Index("ix_task_statuses_group", "group"),
+    )
+
+
+class VariantScore(Base):
+    __tablename__ = "variant_scores"
+    group = sa.Column("group", sa.Integer, sa.ForeignKey("groups.id"), primary_key=True, nullable=False)
+    variant = sa.Column("variant", sa.Integer, sa.ForeignKey("variants.id"), primary_key=True, nullable=False)
+    solved = sa.Column("solved", sa.Integer, nullable=False)
+    earned = sa.Column("earned", sa.Integer, nullable=False)
+    __table_args__ = (
+        sa.Index("ix_variant_scores_solved_earned", "solved", "earned"),
+    )
 
 
 class Message(Base):
@@ -108,6 +214,22 @@ class Message(Base):
     session_id = sa.Column("session_id", sa.String, nullable=True)
     processed = sa.Column("processed", sa.Boolean, nullable=False)
     student = sa.Column("student", sa.Integer, sa.ForeignKey("students.id"), nullable=True)
+    claimed_by = sa.Column("claimed_by", sa.String, nullable=True)
+    lease_expires = sa.Column("lease_expires", sa.DateTime, nullable=True)
+    attempts = sa.Column("attempts", sa.Integer, nullable=False, default=0, server_default="0")
+    quarantined = sa.Column("quarantined", sa.Boolean, nullable=False, default=False, server_default=sa.false())
+    error = sa.Column("error", sa.String, nullable=True)
+    __table_args__ = (
+        sa.Index(
+            "ix_messages_pending",
+            "time",
+            sqlite_where=sa.text("processed = 0"),
+            postgresql_where=sa.text("NOT processed"),
+        ),
+        sa.Index("ix_messages_student", "student"),
+        sa.Index("ix_messages_session_id", "session_id"),
+        sa.Index("ix_messages_slot", "group", "variant", "task", "time"),
+    )
 
 
 class MessageCheck(Base):
@@ -118,6 +240,35 @@ class MessageCheck(Base):
     status = sa.Column('status', sa.Integer, nullable=False)
     output = sa.Column('output', sa.String, nullable=True)
     achievement = sa.Column('achievement', sa.Integer, nullable=True)
+    analysis_pending = sa.Column(
+        'analysis_pending',
+        sa.Boolean,
+        nullable=False,
+        default=False,
+        server_default=sa.false(),
+    )
+    lookup_duration = sa.Column('lookup_duration', sa.Float, nullable=True)
+    check_duration = sa.Column('check_duration', sa.Float, nullable=True)
+    write_duration = sa.Column('write_duration', sa.Float, nullable=True)
+    analysis_duration = sa.Column('analysis_duration', sa.Float, nullable=True)
+    priority = sa.Column('priority', sa.String, nullable=True)
+    queue_duration = sa.Column('queue_duration', sa.Float, nullable=True)
+    analysis_task = sa.Column('analysis_task', sa.Integer, nullable=True)
+    __table_args__ = (
+        sa.Index("ix_message_checks_message", "message"),
+        sa.Index(
+            "ix_message_checks_analysis_pending",
+            "id",
+            sqlite_where=sa.text("analysis_pending = 1"),
+            postgresql_where=sa.text("analysis_pending"),
+        ),
+    )
+
+
+class AnalysisResult(Base):
+    __tablename__ = "analysis_results"
+    check = sa.Column("check", sa.Integer, sa.ForeignKey("message_checks.id"), primary_key=True, nullable=False)
+    achievement = sa.Column("achievement", sa.Integer, nullable=True)
 
 
 class FinalSeed(Base):
@@ -133,12 +284,15 @@ class Student(Base):
     external_id = sa.Column("external_id", sa.BigInteger, nullable=True)
     provider = sa.Column("provider", sa.String, nullable=True)
     email = sa.Column("email", sa.String, nullable=False)
-    group = sa.Column("group", sa.String, nullable=True)
-    variant = sa.Column("variant", sa.Integer, nullable=True)
+    group = sa.Column("group", sa.Integer, sa.ForeignKey("groups.id"), nullable=True)
+    variant = sa.Column("variant", sa.Integer, sa.ForeignKey("variants.id"), nullable=True)
     password_hash = sa.Column("password_hash", sa.String, nullable=True)
     unconfirmed_hash = sa.Column("unconfirmed_hash", sa.String, nullable=True)
     blocked = sa.Column("blocked", sa.Boolean, nullable=False)
     teacher = sa.Column("teacher", sa.Boolean, nullable=True)
+    __table_args__ = (
+        sa.Index("ix_students_email", "email"),
+    )
 
 
 class Mailer(Base):
@@ -152,3 +306,15 @@ class AllowedIp(Base):
     id = sa.Column("id", sa.Integer, primary_key=True, nullable=False, autoincrement=True)
     ip = sa.Column("ip", sa.String, nullable=False)
     label = sa.Column("label", sa.String, nullable=True)
+
+
+class Verdict(Base):
+    __tablename__ = "verdicts"
+    group_title = sa.Column("group_title", sa.String, primary_key=True, nullable=False)
+    task = sa.Column("task", sa.Integer, primary_key=True, nullable=False)
+    variant = sa.Column("variant", sa.Integer, primary_key=True, nullable=False)
+    code_hash = sa.Column("code_hash", sa.String, primary_key=True, nullable=False)
+    core_version = sa.Column("core_version", sa.String, primary_key=True, nullable=False)
+    ok = sa.Column("ok", sa.Boolean, nullable=False)
+    output = sa.Column("output", sa.String, nullable=True)
+    time = sa.Column("time", sa.DateTime, nullable=False)
@@ -1,14 +1,22 @@
 import datetime
+import threading
+import time
 import uuid
-from typing import Callable
+from contextlib import AbstractContextManager, contextmanager
+from typing import Callable, Iterable, Iterator
 
-from sqlalchemy import desc, func, literal, null, text
-from sqlalchemy.orm import Session
+from sqlalchemy import Engine, Float, case, cast, desc, exists, func, insert, literal, null, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, aliased, defer, sessionmaker
 
+from webapp.metrics import db_sessions
 from webapp.models import (
     AllowedIp,
+    AnalysisResult,
     FinalSeed,
     Group,
+    LockStats,
     Mailer,
     Message,
     MessageCheck,
@@ -18,37 +26,144 @@ from webapp.models import (
     TaskStatus,
     TypeOfTask,
     Variant,
+    VariantScore,
+    Verdict,
     create_session_maker
 )
+from webapp.wakeup import ANALYSIS_CHANNEL, notify_pending
+
+
+CLAIM_LOCK = 7210001
+upserts = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+SOLVED = (Status.Checked, Status.CheckedFailed, Status.CheckedSubmitted)
+
+
+def refresh_variant_score(session: Session, group: int, variant: int):
+    dialect = session.get_bind().dialect
+    if dialect.name in upserts:
+        session.execute(upserts[dialect.name](VariantScore)
+                        .values(group=group, variant=variant, solved=0, earned=0)
+                        .on_conflict_do_nothing())
+    elif session.get(VariantScore, (group, variant)) is None:
+        session.add(VariantScore(group=group, variant=variant, solved=0, earned=0))
+        session.flush()
+    score = session.query(VariantScore) \
+        .filter_by(group=group, variant=variant) \
+        .with_for_update() \
+        .one()
+    achievements = session.query(TaskStatus.achievements) \
+        .filter_by(group=group, variant=variant) \
+        .filter(TaskStatus.status.in_([s.value for s in SOLVED])) \
+        .all()
+    score.solved = len(achievements)
+    score.earned = sum(max(len(values), 1) for (values,) in achievements)
+
+
+def rebuild_variant_scores(session: Session):
+    rows = session.query(TaskStatus.group, TaskStatus.variant, TaskStatus.achievements) \
+        .filter(TaskStatus.status.in_([s.value for s in SOLVED])) \
+        .all()
+    scores = dict()
+    for group, variant, achievements in rows:
+        solved, earned = scores.get((group, variant), (0, 0))
+        scores[(group, variant)] = (solved + 1, earned + max(len(achievements), 1))
+    session.query(VariantScore).delete()
+    if scores:
+        session.execute(insert(VariantScore), [
+            dict(group=group, variant=variant, solved=solved, earned=earned)
+            for (group, variant), (solved, earned) in scores.items()
+        ])
 
 
 class DbContext:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, shared: bool = False, write: bool = False):
         self.session = session
+        self.shared = shared
+        self.write = write
 
     def __enter__(self) -> Session:
-        self.session.execute(text("PRAGMA foreign_keys=ON"))
+        if self.write and not self.shared:
+            self.begin_write()
         return self.session
 
     def __exit__(self, exc_type: type[BaseException] | None, exc_val, trace):
+        if self.shared:
+            if exc_type is None:
+                self.session.flush()
+            return
         if exc_type is not None:
             self.session.rollback()
         else:
             self.session.commit()
         self.session.close()
 
+    def begin_write(self):
+        retries = self.session.info.get("lock_retries", 0)
+        backoff = self.session.info.get("lock_backoff", 0.0)
+        stats: LockStats | None = self.session.info.get("lock_stats")
+        for attempt in range(retries + 1):
+            try:
+                self.session.connection(execution_options=dict(sqlite_begin="IMMEDIATE"))
+                return
+            except OperationalError as error:
+                self.session.rollback()
+                locked = "database is locked" in str(error.orig)
+                if not locked or attempt == retries:
+                    if locked and stats:
+                        stats.failures += 1
+                    self.session.close()
+                    raise
+                if stats:
+                    stats.retries += 1
+                time.sleep(backoff * 2 ** attempt)
+
 
 class DbContextManager:
-    def __init__(self, get_connection: Callable[[], str]):
+    def __init__(self, get_connection: Callable[[], str], get_options: Callable[[], dict] = dict):
         self.get_connection = get_connection
+        self.get_options = get_options
+        self.local = threading.local()
 
-    def create_session(self) -> DbContext:
+    @property
+    def maker(self) -> sessionmaker:
         connection_string = self.get_connection()
-        maker = create_session_maker(connection_string)
-        session = maker(expire_on_commit=False)
-        context = DbContext(session)
+        return create_session_maker(connection_string, **self.get_options())
+
+    @property
+    def engine(self) -> Engine:
+        return self.maker.kw["bind"]
+
+    @property
+    def lock_stats(self) -> LockStats:
+        return self.maker.kw["info"]["lock_stats"]
+
+    def create_session(self, write: bool = False) -> DbContext:
+        shared = getattr(self.local, "session", None)
+        if shared is not None:
+            return DbContext(shared, shared=True)
+        session = self.maker()
+        db_sessions.inc("write" if write else "read")
+        context = DbContext(session, write=write)
         return context
 
+    @contextmanager
+    def unit_of_work(self) -> Iterator[Session]:
+        shared = getattr(self.local, "session", None)
+        if shared is not None:
+            yield shared
+            return
+        with self.create_session(write=True) as session:
+            self.local.session = session
+            try:
+                yield session
+            finally:
+                self.local.session = None
+
 
 class GroupRepository:
     def __init__(self, db: DbContextManager):
@@ -77,8 +192,14 @@ class GroupRepository:
             group = session.get(Group, group_id)
             return group
 
-    def rename(self, group_id: int, title: str, external: str):
+    def get_by_ids(self, ids: Iterable[int]) -> list[Group]:
         with self.db.create_session() as session:
+            return session.query(Group) \
+                .filter(Group.id.in_(list(ids))) \
+                .all()
+
+    def rename(self, group_id: int, title: str, external: str):
+        with self.db.create_session(write=True) as session:
             session.query(Group) \
                 .filter_by(id=group_id) \
                 .update(dict(title=title, external=external))
@@ -88,13 +209,13 @@ class GroupRepository:
             self.create(name)
 
     def create(self, name: str) -> Group:
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             group = Group(title=name)
             session.add(group)
             return group
 
     def delete_all(self):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(Group).delete()
 
 
@@ -112,13 +233,19 @@ class TaskRepository:
             task = session.get(Task, task_id)
             return task
 
-    def create(self, id: int, type: TypeOfTask = TypeOfTask.Static):
+    def get_by_ids(self, ids: Iterable[int]) -> list[Task]:
         with self.db.create_session() as session:
+            return session.query(Task) \
+                .filter(Task.id.in_(list(ids))) \
+                .all()
+
+    def create(self, id: int, type: TypeOfTask = TypeOfTask.Static):
+        with self.db.create_session(write=True) as session:
             group = Task(id=id, type=type)
             session.add(group)
 
     def delete_all(self):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(Task).delete()
 
 
@@ -136,14 +263,20 @@ class VariantRepository:
             variant = session.get(Variant, variant_id)
             return variant
 
-    def create_by_ids(self, ids: list[int]):
+    def get_by_ids(self, ids: Iterable[int]) -> list[Variant]:
         with self.db.create_session() as session:
+            return session.query(Variant) \
+                .filter(Variant.id.in_(list(ids))) \
+                .all()
+
+    def create_by_ids(self, ids: list[int]):
+        with self.db.create_session(write=True) as session:
             for variant_id in ids:
                 task = Variant(id=variant_id)
                 session.add(task)
 
     def delete_all(self):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(Variant).delete()
 
     def get_student_variants(self, student: int, group: int) -> list[int]:
@@ -171,32 +304,44 @@ class TaskStatusRepository:
                 .all()
             return statuses
 
-    def get_group_rating(self) -> list[tuple[Group, int]]:
+    def get_group_rating(self, limits: dict[str, int], default: int) -> list[tuple[Group, int]]:
         with self.db.create_session() as session:
             tasks = session.query(Task).count()
-            variants = session \
-                .query(TaskStatus.group, TaskStatus.variant) \
-                .filter((TaskStatus.status == Status.Checked) |
-                        (TaskStatus.status == Status.CheckedFailed) |
-                        (TaskStatus.status == Status.CheckedSubmitted)) \
-                .group_by(TaskStatus.variant, TaskStatus.group) \
-                .having(func.count() >= tasks) \
-                .subquery()
-            scores = session \
-                .query(Group, variants.c.variant) \
-                .join(variants, Group.id == variants.c.group, isouter=True) \
+            limit = literal(default)
+            if limits:
+                limit = case(*[(Group.title == title, value) for title, value in limits.items()], else_=default)
+            earned = func.count(VariantScore.variant)
+            return session.query(Group, earned) \
+                .join(VariantScore, (VariantScore.group == Group.id) &
+                      (VariantScore.solved >= tasks) &
+                      (VariantScore.solved > 0) &
+                      (VariantScore.variant < limit), isouter=True) \
+                .group_by(Group.id) \
+                .order_by(desc(earned), Group.id) \
                 .all()
-            return scores
 
-    def get_rating(self) -> list[tuple[Group, TaskStatus]]:
+    def get_rating(self, places: int) -> list[tuple[Group, int, int]]:
         with self.db.create_session() as session:
-            statuses = session.query(Group, TaskStatus) \
-                .join(TaskStatus, TaskStatus.group == Group.id) \
-                .filter((TaskStatus.status == Status.Checked) |
-                        (TaskStatus.status == Status.CheckedFailed) |
-                        (TaskStatus.status == Status.CheckedSubmitted)) \
+            tasks = session.query(Task).count()
+            solved = (VariantScore.solved >= tasks) & (VariantScore.solved > 0)
+            top = session.query(VariantScore.earned) \
+                .filter(solved) \
+                .distinct() \
+                .order_by(desc(VariantScore.earned)) \
+                .limit(places) \
+                .subquery()
+            threshold = select(func.min(top.c.earned)).scalar_subquery()
+            return session.query(Group, VariantScore.variant, VariantScore.earned) \
+                .join(VariantScore, VariantScore.group == Group.id) \
+                .filter(solved, VariantScore.earned >= threshold) \
+                .order_by(desc(VariantScore.earned), VariantScore.group, VariantScore.variant) \
                 .all()
-            return statuses
+
+    def get_variant_score(self, group: int, variant: int) -> VariantScore | None:
+        with self.db.create_session() as session:
+            return session.query(VariantScore) \
+                .filter_by(group=group, variant=variant) \
+                .first()
 
     def get_task_status(self, task: int, variant: int, group: int) -> TaskStatus | None:
         with self.db.create_session() as session:
@@ -206,61 +351,78 @@ class TaskStatusRepository:
             return status
 
     def delete_group_task_statuses(self, group: int):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             status = session.query(TaskStatus) \
                 .filter_by(group=group) \
                 .delete()
+            session.query(VariantScore) \
+                .filter_by(group=group) \
+                .delete()
             return status
 
     def record_achievement(self, task: int, variant: int, group: int, achievement: int):
-        existing = self.get_task_status(task, variant, group)
-        if not existing:
-            return
-        achievements = list(set(existing.achievements + [achievement]))
-        with self.db.create_session() as session:
+        with self.db.unit_of_work() as session:
+            existing = self.get_task_status(task, variant, group)
+            if not existing:
+                return
+            achievements = list(set(existing.achievements + [achievement]))
             session.query(TaskStatus) \
                 .filter_by(task=task, variant=variant, group=group) \
                 .update(dict(achievements=achievements))
+            refresh_variant_score(session, group, variant)
 
     def clear_achievements(self):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(TaskStatus) \
                 .update(dict(achievements=None))
+            rebuild_variant_scores(session)
 
     def check(self, task: int, variant: int, group: int, code: str, ok: bool, output: str, ip: str):
-        def status():
-            existing = self.get_task_status(task, variant, group)
-            if existing and existing.status in [Status.Checked, Status.CheckedFailed, Status.CheckedSubmitted]:
-                return Status.Checked if ok else Status.CheckedFailed
-            return Status.Checked if ok else Status.Failed
-
-        return self.create_or_update(task, variant, group, code, status(), output, ip)
+        status = Status.Checked if ok else Status.Failed
+        checked = Status.Checked if ok else Status.CheckedFailed
+        with self.db.unit_of_work() as session:
+            updated = self.upsert(task, variant, group, code, status, checked, output, ip)
+            refresh_variant_score(session, group, variant)
+            return updated
 
     def submit_task(self, task: int, variant: int, group: int, code: str, ip: str) -> TaskStatus:
-        checked = [Status.Checked, Status.CheckedFailed, Status.CheckedSubmitted]
-        existing = self.get_task_status(task, variant, group)
-        status = Status.CheckedSubmitted if existing and existing.status in checked else Status.Submitted
-        return self.create_or_update(task, variant, group, code, status, None, ip)
+        return self.upsert(task, variant, group, code, Status.Submitted, Status.CheckedSubmitted, None, ip)
 
-    def create_or_update(self, task: int, variant: int, group: int, code: str, status: int, output: str, ip: str):
-        now = datetime.datetime.now()
-        with self.db.create_session() as session:
-            query = session.query(TaskStatus).filter_by(task=task, variant=variant, group=group)
-            if query.count():
-                query.update(dict(code=code, status=status, output=output, ip=ip, time=now))
-                updated: TaskStatus = query.one()
-                return updated
-            model = TaskStatus(
-                time=now,
-                task=task,
-                variant=variant,
-                group=group,
-                code=code,
-                status=status,
-                output=output,
-                ip=ip)
-            session.add(model)
-            return model
+    def upsert(
+        self,
+        task: int,
+        variant: int,
+        group: int,
+        code: str,
+        status: Status,
+        checked: Status,
+        output: str | None,
+        ip: str,
+    ) -> TaskStatus:
+        previous = [Status.Checked, Status.CheckedFailed, Status.CheckedSubmitted]
+        with self.db.create_session(write=True) as session:
+            dialect = session.get_bind().dialect
+            now = datetime.datetime.now()
+            values = dict(code=code, output=output, ip=ip, time=now)
+            transition = case(
+                (TaskStatus.status.in_([s.value for s in previous]), checked.value),
+                else_=status.value,
+            )
+            query = upserts[dialect.name](TaskStatus) \
+                .values(task=task, variant=variant, group=group, status=status, **values) \
+                .on_conflict_do_update(
+                    index_elements=[TaskStatus.task, TaskStatus.variant, TaskStatus.group],
+                    set_=dict(status=transition, **values))
+            if not dialect.insert_returning:
+                session.execute(query)
+                return session.query(TaskStatus) \
+                    .populate_existing() \
+                    .filter_by(task=task, variant=variant, group=group) \
+                    .one()
+            query = query \
+                .returning(TaskStatus) \
+                .execution_options(populate_existing=True)
+            return session.scalars(query).one()
 
 
 class MessageRepository:
@@ -277,7 +439,7 @@ class MessageRepository:
         student: int | None,
         session_id: str | None = None
     ) -> Message:
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             message = Message(
                 processed=False,
                 time=datetime.datetime.now(),
@@ -290,6 +452,7 @@ class MessageRepository:
                 session_id=session_id
             )
             session.add(message)
+            notify_pending(session)
             return message
 
     def get_all(self) -> list[Message]:
@@ -323,6 +486,113 @@ class MessageRepository:
                 .first()
             return message
 
+    def claim_pending(
+        self,
+        worker: str,
+        count: int,
+        lease: float,
+        weights: dict[str, float] | None = None,
+    ) -> list[Message]:
+        weights = weights or dict(exam=1, practice=1)
+        now = datetime.datetime.now()
+        claimable = or_(Message.lease_expires.is_(None), Message.lease_expires < now)
+        older = aliased(Message)
+        blocked = exists().where(
+            older.group == Message.group,
+            older.variant == Message.variant,
+            older.task == Message.task,
+            older.id < Message.id,
+            older.processed.is_(False),
+            older.quarantined.is_(False),
+            older.lease_expires >= now,
+        )
+        exam = exists().where(FinalSeed.group == Message.group, FinalSeed.active.is_(True))
+        weight = case((exam, float(weights["exam"])), else_=float(weights["practice"]))
+        rank = func.row_number().over(
+            partition_by=(Message.group, Message.student),
+            order_by=(Message.time, Message.id),
+        )
+        with self.db.create_session(write=True) as session:
+            if session.get_bind().dialect.name == "postgresql":
+                session.execute(select(func.pg_advisory_xact_lock(CLAIM_LOCK)))
+            candidates = session.query(
+                Message.id,
+                Message.group,
+                Message.variant,
+                Message.task,
+                Message.time,
+                (cast(rank, Float) / weight).label("score"),
+            ) \
+                .filter_by(processed=False, quarantined=False) \
+                .filter(claimable, ~blocked) \
+                .subquery()
+            score = func.max(candidates.c.score).over(
+                partition_by=(candidates.c.group, candidates.c.variant, candidates.c.task),
+                order_by=(candidates.c.time, candidates.c.id),
+                rows=(None, 0),
+            )
+            ranked = session.query(candidates.c.id, candidates.c.time, score.label("score")).subquery()
+            ids = session.query(ranked.c.id) \
+                .order_by(ranked.c.score, ranked.c.time, ranked.c.id) \
+                .limit(count) \
+                .all()
+            ids = session.query(Message.id) \
+                .filter(Message.id.in_([id for (id,) in ids])) \
+                .filter_by(processed=False, quarantined=False) \
+                .filter(claimable, ~blocked) \
+                .with_for_update(skip_locked=True) \
+                .all()
+            ids = [id for (id,) in ids]
+            session.query(Message) \
+                .filter(Message.id.in_(ids)) \
+                .update(dict(
+                    claimed_by=worker,
+                    lease_expires=now + datetime.timedelta(seconds=lease),
+                    attempts=Message.attempts + 1,
+                ), synchronize_session=False)
+            return session.query(Message) \
+                .options(defer(Message.code)) \
+                .filter(Message.id.in_(ids)) \
+                .order_by(Message.time.asc()) \
+                .all()
+
+    def get_codes(self, ids: list[int]) -> dict[int, str]:
+        with self.db.create_session() as session:
+            codes = session.query(Message.id, Message.code) \
+                .filter(Message.id.in_(ids)) \
+                .all()
+            return {id: code for id, code in codes}
+
+    def renew_lease(self, worker: str, ids: list[int], lease: float) -> int:
+        with self.db.create_session(write=True) as session:
+            return session.query(Message) \
+                .filter(Message.id.in_(ids)) \
+                .filter_by(processed=False, claimed_by=worker) \
+                .update(dict(
+                    lease_expires=datetime.datetime.now() + datetime.timedelta(seconds=lease),
+                ), synchronize_session=False)
+
+    def get_superseded(self, ids: list[int]) -> dict[int, bool]:
+        newer = aliased(Message)
+        solved = exists().where(
+            TaskStatus.group == Message.group,
+            TaskStatus.variant == Message.variant,
+            TaskStatus.task == Message.task,
+            TaskStatus.status.in_([s.value for s in SOLVED]),
+        )
+        with self.db.create_session() as session:
+            superseded = session.query(Message.id, solved) \
+                .filter(Message.id.in_(ids)) \
+                .filter(exists().where(
+                    newer.group == Message.group,
+                    newer.variant == Message.variant,
+                    newer.task == Message.task,
+                    newer.id > Message.id,
+                    newer.quarantined.is_(False),
+                )) \
+                .all()
+            return {id: solved for id, solved in superseded}
+
     def get_by_id(self, id: int) -> Message:
         with self.db.create_session() as session:
             message = session.query(Message) \
@@ -337,11 +607,76 @@ class MessageRepository:
                 .order_by(Message.time.desc()) \
                 .all()
 
-    def mark_as_processed(self, message: int):
+    def retry_later(self, message: int, worker: str, delay: float, error: str) -> bool:
+        with self.db.create_session(write=True) as session:
+            return session.query(Message) \
+                .filter_by(id=message, processed=False, claimed_by=worker) \
+                .update(dict(
+                    lease_expires=datetime.datetime.now() + datetime.timedelta(seconds=delay),
+                    error=error,
+                )) > 0
+
+    def quarantine(self, message: int, worker: str, error: str) -> bool:
+        with self.db.create_session(write=True) as session:
+            return session.query(Message) \
+                .filter_by(id=message, processed=False, claimed_by=worker) \
+                .update(dict(quarantined=True, lease_expires=None, error=error)) > 0
+
+    def get_quarantined(self) -> list[Message]:
         with self.db.create_session() as session:
-            session.query(Message) \
-                .filter_by(id=message) \
-                .update(dict(processed=True))
+            return session.query(Message) \
+                .options(defer(Message.code)) \
+                .filter_by(processed=False, quarantined=True) \
+                .order_by(Message.time.asc()) \
+                .all()
+
+    def requeue_quarantined(self) -> int:
+        newer = aliased(Message)
+        overtaken = exists().where(
+            newer.group == Message.group,
+            newer.variant == Message.variant,
+            newer.task == Message.task,
+            newer.id > Message.id,
+            newer.quarantined.is_(False),
+            or_(newer.processed.is_(True), newer.lease_expires.isnot(None)),
+        )
+        with self.db.create_session(write=True) as session:
+            superseded = [id for id, in session.query(Message.id)
+                          .filter_by(processed=False, quarantined=True)
+                          .filter(overtaken)
+                          .all()]
+            if superseded:
+                session.query(Message) \
+                    .filter(Message.id.in_(superseded)) \
+                    .update(dict(processed=True, quarantined=False, lease_expires=None))
+                now = datetime.datetime.now()
+                session.add_all(
+                    MessageCheck(time=now, message=id, status=Status.Superseded, output=None)
+                    for id in superseded
+                )
+            requeued = session.query(Message) \
+                .filter_by(processed=False, quarantined=True) \
+                .update(dict(quarantined=False, attempts=0, lease_expires=None, error=None))
+            if requeued:
+                notify_pending(session)
+            return requeued
+
+    def get_queue_stats(self) -> tuple[int, int, datetime.datetime | None]:
+        with self.db.create_session() as session:
+            pending, oldest = session.query(func.count(Message.id), func.min(Message.time)) \
+                .filter_by(processed=False, quarantined=False) \
+                .one()
+            quarantined = session.query(func.count(Message.id)) \
+                .filter_by(processed=False, quarantined=True) \
+                .scalar()
+            return pending, quarantined, oldest
+
+    def mark_as_processed(self, message: int, worker: str | None = None) -> bool:
+        with self.db.create_session(write=True) as session:
+            query = session.query(Message).filter_by(id=message)
+            if worker is not None:
+                query = query.filter_by(claimed_by=worker)
+            return query.update(dict(processed=True, lease_expires=None)) > 0
 
 
 class MessageCheckRepository:
@@ -421,25 +756,90 @@ class MessageCheckRepository:
                 .count()
 
     def record_achievement(self, check: int, achievement: int):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(MessageCheck) \
                 .filter_by(id=check) \
                 .update(dict(achievement=achievement))
 
+    def get_pending_analyses(self, count: int) -> list[tuple[MessageCheck, Message]]:
+        with self.db.create_session() as session:
+            return session.query(MessageCheck, Message) \
+                .join(Message, Message.id == MessageCheck.message) \
+                .filter(MessageCheck.analysis_pending.is_(True)) \
+                .order_by(MessageCheck.id) \
+                .limit(count) \
+                .all()
+
+    def get_checked_after(self, check: int, count: int) -> list[tuple[MessageCheck, Message]]:
+        with self.db.create_session() as session:
+            return session.query(MessageCheck, Message) \
+                .join(Message, Message.id == MessageCheck.message) \
+                .filter(MessageCheck.status == Status.Checked) \
+                .filter(MessageCheck.id > check) \
+                .order_by(MessageCheck.id) \
+                .limit(count) \
+                .all()
+
+    def record_analysis(self, check: int, achievement: int | None, duration: float | None = None):
+        with self.db.create_session(write=True) as session:
+            session.query(MessageCheck) \
+                .filter_by(id=check) \
+                .update(dict(achievement=achievement, analysis_pending=False, analysis_duration=duration))
+
+    def record_write_duration(self, check: int, duration: float):
+        with self.db.create_session(write=True) as session:
+            session.query(MessageCheck) \
+                .filter_by(id=check) \
+                .update(dict(write_duration=duration))
+
+    def get_recent_timings(self, count: int) -> list[tuple]:
+        with self.db.create_session() as session:
+            return session.query(
+                MessageCheck.time.label("checked"),
+                Message.time.label("sent"),
+                MessageCheck.status,
+                MessageCheck.lookup_duration,
+                MessageCheck.check_duration,
+                MessageCheck.write_duration,
+                MessageCheck.analysis_duration,
+                MessageCheck.priority,
+                MessageCheck.queue_duration,
+            ) \
+                .join(Message, Message.id == MessageCheck.message) \
+                .order_by(desc(MessageCheck.id)) \
+                .limit(count) \
+                .all()
+
     def record_check(
         self,
         message: int,
         status: TaskStatus,
         output: str | None,
+        analysis_pending: bool = False,
+        lookup_duration: float | None = None,
+        check_duration: float | None = None,
+        write_duration: float | None = None,
+        priority: str | None = None,
+        queue_duration: float | None = None,
+        analysis_task: int | None = None,
     ) -> MessageCheck:
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             check = MessageCheck(
                 time=datetime.datetime.now(),
                 message=message,
                 status=status,
                 output=output,
+                analysis_pending=analysis_pending,
+                lookup_duration=lookup_duration,
+                check_duration=check_duration,
+                write_duration=write_duration,
+                priority=priority,
+                queue_duration=queue_duration,
+                analysis_task=analysis_task,
             )
             session.add(check)
+            if analysis_pending:
+                notify_pending(session, ANALYSIS_CHANNEL)
             return check
 
 
@@ -453,25 +853,31 @@ class FinalSeedRepository:
                 .filter_by(group=group) \
                 .first()
 
+    def get_final_seeds(self, groups: Iterable[int]) -> list[FinalSeed]:
+        with self.db.create_session() as session:
+            return session.query(FinalSeed) \
+                .filter(FinalSeed.group.in_(list(groups))) \
+                .all()
+
     def begin_final_test(self, group: int):
         seed = str(uuid.uuid4())
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.add(FinalSeed(group=group, seed=seed, active=True))
 
     def continue_final_test(self, group: int):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(FinalSeed) \
                 .filter_by(group=group) \
                 .update(dict(active=True))
 
     def end_final_test(self, group: int):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(FinalSeed) \
                 .filter_by(group=group) \
                 .update(dict(active=False))
 
     def delete_final_seed(self, group: int):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(FinalSeed) \
                 .filter_by(group=group) \
                 .delete()
@@ -507,7 +913,7 @@ class StudentRepository:
 
     def change_password(self, email: str, password: str) -> bool:
         email = email.lower()
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             query = session.query(Student).filter_by(email=email)
             student: Student = query.first()
             if student.unconfirmed_hash is not None:
@@ -516,7 +922,7 @@ class StudentRepository:
 
     def confirm(self, email: str):
         email = email.lower()
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             query = session.query(Student).filter_by(email=email)
             student: Student = query.first()
             if student.unconfirmed_hash is not None:
@@ -527,13 +933,13 @@ class StudentRepository:
 
     def create(self, email: str, password: str, teacher=False) -> Student:
         email = email.lower()
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             student = Student(email=email, unconfirmed_hash=password, teacher=teacher, blocked=False)
             session.add(student)
             return student
 
     def create_external(self, email: str, provider: str) -> Student:
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             student = Student(
                 email=email,
                 provider=provider,
@@ -543,13 +949,13 @@ class StudentRepository:
             return student
 
     def update_group(self, student: int, group: int | None):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(Student) \
                 .filter_by(id=student) \
                 .update(dict(group=group))
 
     def update_variant(self, student: int, variant_id: int | None):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(Student) \
                 .filter_by(id=student) \
                 .update(dict(variant=variant_id))
@@ -573,7 +979,7 @@ class MailerRepository:
 
     def create(self, domain: str) -> Mailer:
         domain = domain.lower()
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             mailer = Mailer(domain=domain)
             session.add(mailer)
             return mailer
@@ -599,21 +1005,114 @@ class AllowedIpRepository:
                 .all()
 
     def allow(self, ip: str, label: str):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             aip = AllowedIp(ip=ip, label=label)
             session.add(aip)
             return aip
 
     def disallow(self, id: int):
-        with self.db.create_session() as session:
+        with self.db.create_session(write=True) as session:
             session.query(AllowedIp) \
                 .filter_by(id=id) \
                 .delete()
 
 
+class VerdictRepository:
+    def __init__(self, db: DbContextManager):
+        self.db = db
+
+    def get(self, group_title: str, task: int, variant: int, code_hash: str, core_version: str) -> Verdict | None:
+        with self.db.create_session() as session:
+            return session.query(Verdict) \
+                .filter_by(
+                    group_title=group_title,
+                    task=task,
+                    variant=variant,
+                    code_hash=code_hash,
+                    core_version=core_version,
+                ) \
+                .first()
+
+    def store(
+        self,
+        group_title: str,
+        task: int,
+        variant: int,
+        code_hash: str,
+        core_version: str,
+        ok: bool,
+        output: str | None,
+    ):
+        with self.db.create_session(write=True) as session:
+            values = dict(
+                group_title=group_title,
+                task=task,
+                variant=variant,
+                code_hash=code_hash,
+                core_version=core_version,
+                ok=ok,
+                output=output,
+                time=datetime.datetime.now(),
+            )
+            dialect = session.get_bind().dialect
+            if dialect.name in upserts:
+                session.execute(upserts[dialect.name](Verdict).values(**values).on_conflict_do_nothing())
+            elif not self.get(group_title, task, variant, code_hash, core_version):
+                session.add(Verdict(**values))
+
+
+class AnalysisResultRepository:
+    def __init__(self, db: DbContextManager):
+        self.db = db
+
+    def get_last_check(self) -> int | None:
+        with self.db.create_session() as session:
+            return session.query(func.max(AnalysisResult.check)).scalar()
+
+    def store(self, results: list[tuple[int, int | None]]):
+        if not results:
+            return
+        with self.db.create_session(write=True) as session:
+            session.execute(
+                insert(AnalysisResult),
+                [dict(check=check, achievement=achievement) for check, achievement in results],
+            )
+
+    def apply(self):
+        with self.db.create_session(write=True) as session:
+            staged = select(AnalysisResult.achievement) \
+                .where(AnalysisResult.check == MessageCheck.id) \
+                .scalar_subquery()
+            session.execute(
+                update(MessageCheck)
+                .where(MessageCheck.id.in_(select(AnalysisResult.check)))
+                .values(achievement=staged)
+            )
+            rows = session.query(Message.task, Message.variant, Message.group, MessageCheck.achievement) \
+                .join(Message, Message.id == MessageCheck.message) \
+                .join(TaskStatus, (TaskStatus.task == Message.task) &
+                      (TaskStatus.variant == Message.variant) &
+                      (TaskStatus.group == Message.group)) \
+                .filter(MessageCheck.status == Status.Checked) \
+                .filter(MessageCheck.achievement.is_not(None)) \
+                .all()
+            achievements = dict()
+            for task, variant, group, achievement in rows:
+                achievements.setdefault((task, variant, group), set()).add(achievement)
+            session.query(TaskStatus).update(dict(achievements=None))
+            if achievements:
+                session.execute(update(TaskStatus), [
+                    dict(task=task, variant=variant, group=group, achievements=sorted(values))
+                    for (task, variant, group), values in achievements.items()
+                ])
+            rebuild_variant_scores(session)
+            session.query(AnalysisResult).delete()
+
+
 class AppDatabase:
-    def __init__(self, get_connection: Callable[[], str]):
-        db = DbContextManager(get_connection)
+    def __init__(self, get_connection: Callable[[], str], get_options: Callable[[], dict] = dict):
+        db = DbContextManager(get_connection, get_options)
+        self.db = db
         self.groups = GroupRepository(db)
         self.variants = VariantRepository(db)
         self.tasks = TaskRepository(db)
@@ -624,3 +1123,8 @@ class AppDatabase:
         self.students = StudentRepository(db)
         self.mailers = MailerRepository(db)
         self.ips = AllowedIpRepository(db)
+        self.verdicts = VerdictRepository(db)
+        self.analysis_results = AnalysisResultRepository(db)
+
+    def unit_of_work(self) -> AbstractContextManager[Session]:
+        return self.db.unit_of_work()
@@ -13,18 +13,23 @@ from jwt import PyJWTError
 
 from flask import Request, redirect
 
+from webapp.metrics import cache_misses, cache_requests
 from webapp.models import Student
 from webapp.repositories import StudentRepository
 
 
 def ttl_cache(duration: int, maxsize=128, typed=False):
     def decorator(func):
+        name = func.__qualname__
+
         @functools.lru_cache(maxsize=maxsize, typed=typed)
         def cached(*args, __time, **kwargs):
+            cache_misses.inc(name)
             return func(*args, **kwargs)
 
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            cache_requests.inc(name)
             return cached(*args, **kwargs, __time=int(time.time() / duration))
         return wrapper
     return decorator
@@ -1,21 +1,30 @@
 from flask import Blueprint
 from flask import current_app as app
-from flask import jsonify, request
+from flask import jsonify, make_response, request
 
 from webapp.forms import CodeLength
-from webapp.managers import AchievementManager, AppConfigManager, ExternalTaskManager, GroupManager, StatusManager
+from webapp.managers import (
+    AchievementManager,
+    AppConfigManager,
+    ExternalTaskManager,
+    GroupManager,
+    MetricsManager,
+    StatusManager
+)
+from webapp.metrics import registry
 from webapp.repositories import AppDatabase
 from webapp.utils import get_exception_info, get_real_ip
 
 
 blueprint = Blueprint("api", __name__, url_prefix="/api/v1")
 config = AppConfigManager(lambda: app.config)
-db = AppDatabase(lambda: config.config.connection_string)
+db = AppDatabase(lambda: config.config.connection_string, lambda: config.config.database_options)
 
 ach = AchievementManager(config)
 ext = ExternalTaskManager(db.groups, db.tasks)
 statuses = StatusManager(db.tasks, db.groups, db.variants, db.statuses, config, db.seeds, db.checks, ach, ext)
 groups = GroupManager(db.groups, db.seeds, ext)
+metrics = MetricsManager(config, db.messages, db.checks)
 
 
 @blueprint.route("/group/prefixes", methods=["GET"])
@@ -75,8 +84,9 @@ def submit_task(gid: int, vid: int, tid: int):
     if status.disabled:
         raise ValueError("Submissions are disallowed.")
     ip = get_real_ip(request)
-    db.messages.submit_task(tid, vid, gid, code, ip, None)
-    db.statuses.submit_task(tid, vid, gid, code, ip)
+    with db.unit_of_work():
+        db.messages.submit_task(tid, vid, gid, code, ip, None)
+        db.statuses.submit_task(tid, vid, gid, code, ip)
     status = statuses.get_task_status(gid, vid, tid)
     return jsonify(dict(
         id=status.task,
@@ -87,6 +97,13 @@ def submit_task(gid: int, vid: int, tid: int):
     ))
 
 
+@blueprint.route("/metrics", methods=["GET"])
+def export_metrics():
+    output = make_response(metrics.export() + registry.render())
+    output.headers["Content-type"] = "text/plain; version=0.0.4"
+    return output
+
+
 @blueprint.errorhandler(Exception)
 def handle_view_errors(e):
     print(get_exception_info())
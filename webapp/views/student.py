@@ -30,7 +30,7 @@ from webapp.utils import authorize, get_exception_info, get_greeting_msg, get_re
 
 blueprint = Blueprint("student", __name__)
 config = AppConfigManager(lambda: app.config)
-db = AppDatabase(lambda: config.config.connection_string)
+db = AppDatabase(lambda: config.config.connection_string, lambda: config.config.database_options)
 
 ach = AchievementManager(config)
 ext = ExternalTaskManager(db.groups, db.tasks)
@@ -38,7 +38,7 @@ statuses = StatusManager(db.tasks, db.groups, db.variants, db.statuses, config,
 
 groups = GroupManager(db.groups, db.seeds, ext)
 students = StudentManager(config, db.students, db.mailers)
-rating = RatingManager(config, db.statuses, ach, db.tasks)
+rating = RatingManager(config, db.statuses)
 home_manager = HomeManager(rating)
 
 
@@ -76,10 +76,10 @@ def submissions(student: Student | None, page: int):
     if not config.config.enable_registration:
         if not session:
             return redirect('/')
-        submissions = statuses.get_anonymous_submissions_statuses(session, (page - 1) * size, size)
+        submissions = statuses.get_anonymous_submissions_statuses(session, max(page - 1, 0) * size, size)
         count = db.checks.count_session_id_submissions(session)
     elif student is not None:
-        submissions = statuses.get_submissions_statuses(student, (page - 1) * size, size)
+        submissions = statuses.get_submissions_statuses(student, max(page - 1, 0) * size, size)
         count = db.checks.count_student_submissions(student)
     else:
         return redirect('/')
@@ -242,8 +242,9 @@ def submit_task(student: Student | None, gid: int, vid: int, tid: int):
     if valid and not status.disabled and db.ips.is_allowed(ip):
         sid = student.id if student else None
         session_id = request.cookies.get("anonymous_identifier")
-        db.messages.submit_task(tid, vid, gid, form.code.data, ip, sid, session_id)
-        db.statuses.submit_task(tid, vid, gid, form.code.data, ip)
+        with db.unit_of_work():
+            db.messages.submit_task(tid, vid, gid, form.code.data, ip, sid, session_id)
+            db.statuses.submit_task(tid, vid, gid, form.code.data, ip)
         return render_template(
             "student/success.jinja",
             status=status,
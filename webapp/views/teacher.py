@@ -23,7 +23,7 @@ from webapp.utils import authorize, get_exception_info
 
 blueprint = Blueprint("teacher", __name__)
 config = AppConfigManager(lambda: app.config)
-db = AppDatabase(lambda: config.config.connection_string)
+db = AppDatabase(lambda: config.config.connection_string, lambda: config.config.database_options)
 
 ext = ExternalTaskManager(db.groups, db.tasks)
 students = StudentManager(config, db.students, db.mailers)
@@ -38,7 +38,7 @@ exports = ExportManager(db.groups, db.messages, statuses, db.variants, db.tasks,
 @authorize(db.students, lambda s: s.teacher)
 def teacher_submissions(teacher: Student, gid: int, vid: int, tid: int, page: int):
     size = 5
-    submissions_statuses = statuses.get_submissions_statuses_by_info(gid, vid, tid, (page - 1) * size, size)
+    submissions_statuses = statuses.get_submissions_statuses_by_info(gid, vid, tid, max(page - 1, 0) * size, size)
     if not submissions_statuses and page > 0:
         return redirect(f"/teacher/submissions/group/{gid}/variant/{vid}/task/{tid}/{page - 1}")
     submissions_count = statuses.count_submissions_by_info(gid, vid, tid)
@@ -83,6 +83,7 @@ def dashboard(teacher: Student):
     vlist = db.variants.get_all()
     tlist = db.tasks.get_all()
     ips = db.ips.list_allowed()
+    quarantined = db.messages.get_quarantined()
     return render_template(
         "teacher/dashboard.jinja",
         student=teacher,
@@ -95,9 +96,18 @@ def dashboard(teacher: Student):
         vlist=vlist,
         tlist=tlist,
         ips=ips,
+        quarantined=quarantined,
+        group_titles={group.id: group.title for group in glist},
     )
 
 
+@blueprint.route("/teacher/messages/requeue", methods=["POST"])
+@authorize(db.students, lambda s: s.teacher)
+def requeue_messages(teacher: Student):
+    db.messages.requeue_quarantined()
+    return redirect('/teacher')
+
+
 @blueprint.route("/teacher/group/select", methods=["GET"])
 @authorize(db.students, lambda s: s.teacher)
 def select_group(teacher: Student):
@@ -361,18 +371,19 @@ def handle_authorization_errors(e):
 
 
 def process_message(message: Message, ok: bool, comment: str | None):
-    db.messages.mark_as_processed(message.id)
-    status = db.statuses.check(
-        task=message.task,
-        variant=message.variant,
-        group=message.group,
-        code=message.code,
-        ok=ok,
-        output=comment,
-        ip=message.ip,
-    )
-    db.checks.record_check(
-        message=message.id,
-        status=status.status,
-        output=comment,
-    )
+    with db.unit_of_work():
+        db.messages.mark_as_processed(message.id)
+        status = db.statuses.check(
+            task=message.task,
+            variant=message.variant,
+            group=message.group,
+            code=message.code,
+            ok=ok,
+            output=comment,
+            ip=message.ip,
+        )
+        db.checks.record_check(
+            message=message.id,
+            status=status.status,
+            output=comment,
+        )
@@ -0,0 +1,89 @@
+import os
+import select
+import socket
+import time
+import zlib
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from webapp.models import detach_connection
+
+
+CHANNEL = "pending_messages"
+ANALYSIS_CHANNEL = "pending_analyses"
+
+
+def wakeup_path(path: str | None, url: sa.URL, channel: str = CHANNEL) -> str | None:
+    if not path or not hasattr(socket, "AF_UNIX"):
+        return None
+    root, extension = os.path.splitext(path)
+    digest = "%08x" % zlib.crc32(f"{channel} {url}".encode())
+    return f"{root}-{digest}{extension}"
+
+
+def send_wakeup(path: str):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"\0", path)
+    except OSError:
+        pass
+
+
+def notify_pending(session: Session, channel: str = CHANNEL):
+    bind = session.get_bind()
+    if bind.dialect.name == "postgresql":
+        session.execute(sa.text(f"NOTIFY {channel}"))
+    path = wakeup_path(session.info.get("wakeup_socket"), bind.url, channel)
+    if path:
+        sa.event.listen(session, "after_commit", lambda _: send_wakeup(path), once=True)
+
+
+class WakeupListener:
+    def __init__(self, path: str | None, engine: sa.Engine, channel: str = CHANNEL):
+        self.sock = None
+        self.connection = None
+        self.driver = engine.dialect.driver
+        path = wakeup_path(path, engine.url, channel)
+        if path:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sock.bind(path)
+            self.sock.setblocking(False)
+        if engine.dialect.name == "postgresql":
+            if self.driver not in ("psycopg", "psycopg2"):
+                print(f"LISTEN/NOTIFY wakeups need the psycopg or psycopg2 driver, not {self.driver}")
+                return
+            self.connection = detach_connection(engine)
+            self.connection.execute(sa.text(f"LISTEN {channel}"))
+
+    def wait(self, timeout: float) -> bool:
+        listener = self.connection.connection.driver_connection if self.connection is not None else None
+        sources = [source for source in (self.sock, listener) if source is not None]
+        if not sources:
+            time.sleep(timeout)
+            return False
+        ready, _, _ = select.select(sources, [], [], timeout)
+        if self.sock in ready:
+            while True:
+                try:
+                    self.sock.recv(64)
+                except BlockingIOError:
+                    break
+        if listener is not None and listener in ready:
+            if self.driver == "psycopg":
+                for _ in listener.notifies(timeout=0):
+                    pass
+            else:
+                listener.poll()
+                listener.notifies.clear()
+        return bool(ready)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        if self.connection is not None:
+            self.connection.close()
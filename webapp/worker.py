@@ -1,11 +1,34 @@
+import datetime
+import hashlib
+import multiprocessing
+import os
+import signal
+import socket
 import sys
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from multiprocessing import Process
+from multiprocessing.util import Finalize
 
-from webapp.dto import AppConfig
+from webapp.dto import AppConfig, ExternalTaskDto
+from webapp.leader import LeaderLock, keep_leadership, wait_for_leadership
 from webapp.managers import ExternalTaskManager
+from webapp.models import Message, MessageCheck, Status
 from webapp.repositories import AppDatabase
 from webapp.utils import get_exception_info
+from webapp.wakeup import ANALYSIS_CHANNEL, CHANNEL, WakeupListener
+
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+isolation = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+spawning = multiprocessing.get_context("spawn")
 
 
 def check_solution(
@@ -41,29 +64,249 @@ def analyze_solution(analytics_path: str, task: int, code: str):
     return analyze_solution(task, code)
 
 
-def process_pending_messages(config: AppConfig, db: AppDatabase, external: ExternalTaskManager):
-    pending_messages = db.messages.get_pending_messages()
-    message_count = len(pending_messages)
-    if message_count == 0:
+def analyze_solutions(analytics_path: str, task: int, codes: list[str]):
+    if analytics_path not in sys.path:
+        sys.path.insert(1, analytics_path)
+    import analyze_solution as analytics
+    if hasattr(analytics, "analyze_solutions"):
+        return list(analytics.analyze_solutions(task, codes))
+    return [analytics.analyze_solution(task, code) for code in codes]
+
+
+def analyze_batch(config: AppConfig, task: int, codes: list[str]) -> list[tuple[bool, int | None]]:
+    try:
+        results = analyze_solutions(config.analytics_path, task, codes)
+        if len(results) == len(codes):
+            return results
+        print(f"Batch analysis returned {len(results)} results for {len(codes)} programs")
+    except BaseException:
+        exception = get_exception_info()
+        print(f"Error occured while analyzing a batch of task {task}: {exception}")
+    results = []
+    for code in codes:
+        try:
+            results.append(analyze_solution(config.analytics_path, task, code))
+        except BaseException:
+            exception = get_exception_info()
+            print(f"Error occured while analyzing a program of task {task}: {exception}")
+            results.append((False, None))
+    return results
+
+
+def limit_resources(cpu_limit: int | None, memory_limit: int | None):
+    if resource is None:
         return
-    print(f"Processing {message_count} incoming messages...")
-    for message in pending_messages:
-        group = db.groups.get_by_id(message.group)
-        variant = db.variants.get_by_id(message.variant)
-        task = db.tasks.get_by_id(message.task)
-        seed = db.seeds.get_final_seed(group.id)
-        ext = external.get_external_task(group, variant, task, seed, config)
-        print(f"g-{message.group}, t-{message.task}, v-{message.variant}")
-        print(f"external: {ext.group_title}, t-{ext.task}, v-{ext.variant}")
+    if cpu_limit:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+    if memory_limit:
+        memory = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+
+def isolated_check(connection, config: AppConfig, group_title: str, task: int, variant: int, code: str):
+    try:
+        limit_resources(config.check_cpu_limit, config.check_memory_limit)
+        connection.send((True, check_solution(
+            core_path=config.core_path,
+            group_title=group_title,
+            task=task,
+            variant=variant,
+            code=code,
+        )))
+    except BaseException:
+        connection.send((False, get_exception_info()))
+    finally:
+        connection.close()
+
+
+def check_isolated(config: AppConfig, group_title: str, task: int, variant: int, code: str):
+    reader, writer = isolation.Pipe(duplex=False)
+    process = isolation.Process(target=isolated_check, args=(writer, config, group_title, task, variant, code))
+    process.start()
+    writer.close()
+    try:
+        if not reader.poll(config.check_timeout):
+            process.kill()
+            process.join()
+            return False, f"Превышено время проверки решения ({config.check_timeout} с).", True
         try:
-            ok, error = check_solution(
-                core_path=config.core_path,
-                group_title=ext.group_title,
-                task=ext.task,
-                variant=ext.variant,
-                code=message.code,
-            )
-            print(f"Check result: {ok}, {error}")
+            success, result = reader.recv()
+        except EOFError:
+            process.join()
+            if process.exitcode in (-signal.SIGXCPU, -signal.SIGKILL):
+                return False, f"Превышено процессорное время проверки ({config.check_cpu_limit} с).", True
+            raise RuntimeError(f"Checker process exited with code {process.exitcode}")
+        process.join()
+        if not success:
+            raise RuntimeError(result)
+        ok, error = result
+        return ok, error, False
+    finally:
+        reader.close()
+
+
+def zygote_main(connection, core_path: str):
+    load_config(core_path)
+    while True:
+        try:
+            config, *request = connection.recv()
+        except EOFError:
+            return
+        try:
+            connection.send((True, check_isolated(config, *request)))
+        except BaseException:
+            connection.send((False, get_exception_info()))
+
+
+class Zygote:
+    def __init__(self, core_path: str):
+        self.core_path = core_path
+        self.process = None
+        self.connection = None
+        self.version = None
+        self.checks = 0
+
+    def start(self):
+        self.version = core_version(self.core_path)
+        self.connection, connection = spawning.Pipe()
+        self.process = spawning.Process(target=zygote_main, args=(connection, self.core_path))
+        self.process.start()
+        connection.close()
+        self.checks = 0
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.connection.close()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.process.close()
+        self.process = None
+
+    def check(self, config: AppConfig, group_title: str, task: int, variant: int, code: str):
+        if self.process is None or self.checks >= config.check_zygote_recycle:
+            self.stop()
+            self.start()
+        self.checks += 1
+        try:
+            self.connection.send((config, group_title, task, variant, code))
+            success, result = self.connection.recv()
+        except (EOFError, OSError):
+            self.stop()
+            raise RuntimeError("Checker zygote has exited unexpectedly")
+        if not success:
+            raise RuntimeError(result)
+        return result
+
+
+zygotes: dict[str, Zygote] = dict()
+
+
+def get_zygote(core_path: str) -> Zygote:
+    zygote = zygotes.get(core_path)
+    if zygote is None:
+        zygote = Zygote(core_path)
+        zygotes[core_path] = zygote
+        Finalize(zygote, zygote.stop, exitpriority=10)
+    return zygote
+
+
+os.register_at_fork(after_in_child=zygotes.clear)
+
+
+def core_version(core_path: str) -> str:
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(core_path):
+        dirs[:] = sorted(name for name in dirs if name not in ("__pycache__", ".git"))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            digest.update(f"{os.path.relpath(path, core_path)} {stat.st_size} {stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def get_core_version(core_path: str) -> str:
+    version = core_version(core_path)
+    zygote = zygotes.get(core_path)
+    if zygote is not None and zygote.version != version:
+        zygote.stop()
+    return version
+
+
+def hash_code(code: str) -> str:
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    normalized = "\n".join(line.rstrip(" \t") for line in lines)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def run_check(config: AppConfig, group_title: str, task: int, variant: int, code: str):
+    started = time.perf_counter()
+    if config.check_zygote_recycle:
+        ok, error, timed_out = get_zygote(config.core_path).check(config, group_title, task, variant, code)
+    else:
+        ok, error, timed_out = check_isolated(config, group_title, task, variant, code)
+    return ok, error, timed_out, time.perf_counter() - started
+
+
+def cached_check(ok: bool, error: str):
+    return ok, error, False, 0.0
+
+
+def submit_check(executor: Executor | None, function, *args) -> Future:
+    if executor is not None:
+        return executor.submit(function, *args)
+    future = Future()
+    try:
+        future.set_result(function(*args))
+    except BaseException as e:
+        future.set_exception(e)
+    return future
+
+
+def record_failure(config: AppConfig, db: AppDatabase, message: Message, worker: str, error: str):
+    try:
+        if message.attempts >= config.worker_max_attempts:
+            if db.messages.quarantine(message.id, worker, error):
+                print(f"Message {message.id} is quarantined after {message.attempts} attempts")
+            return
+        delay = config.worker_retry_backoff * 2 ** (message.attempts - 1)
+        if db.messages.retry_later(message.id, worker, delay, error):
+            print(f"Message {message.id} will be retried in {delay} s")
+    except BaseException:
+        exception = get_exception_info()
+        print(f"Error occured while recording a failed check: {exception}")
+
+
+def record_superseded(db: AppDatabase, message: Message, worker: str):
+    with db.unit_of_work():
+        if db.messages.mark_as_processed(message.id, worker):
+            db.checks.record_check(message.id, Status.Superseded, None)
+            print(f"Message {message.id} is superseded by a later submission")
+
+
+def record_check(
+    config: AppConfig,
+    db: AppDatabase,
+    message: Message,
+    future: Future,
+    key: tuple | None,
+    stats: dict,
+    worker: str,
+):
+    try:
+        result = future.result()
+        if result is None:
+            record_superseded(db, message, worker)
+            return
+        ok, error, timed_out, duration = result
+        print(f"Check result for message {message.id}: {ok}, {error}")
+        started = time.perf_counter()
+        with db.unit_of_work():
+            if not db.messages.mark_as_processed(message.id, worker):
+                print(f"Lease for message {message.id} is lost, skipping.")
+                return
             status = db.statuses.check(
                 task=message.task,
                 variant=message.variant,
@@ -73,44 +316,364 @@ def process_pending_messages(config: AppConfig, db: AppDatabase, external: Exter
                 output=error,
                 ip=message.ip,
             )
-            db.messages.mark_as_processed(message.id)
-            check = db.checks.record_check(message.id, status.status, error)
-            if not ok:
-                continue
-            analyzed, order = analyze_solution(
-                analytics_path=config.analytics_path,
-                code=message.code,
-                task=ext.task,
-            )
-            print(f'Analysis result: {analyzed}, {order}')
-            if not analyzed:
-                continue
-            db.checks.record_achievement(
-                check=check.id,
-                achievement=order
-            )
+            verdict = Status.TimedOut if timed_out else status.status
+            check = db.checks.record_check(
+                message.id,
+                verdict,
+                error,
+                analysis_pending=ok and not timed_out,
+                check_duration=duration,
+                **stats,
+            ).id
+            if key is not None and not timed_out:
+                db.verdicts.store(*key, ok, error)
+        db.checks.record_write_duration(check, time.perf_counter() - started)
+    except BrokenProcessPool:
+        raise
+    except BaseException:
+        exception = get_exception_info()
+        print(f"Error occured while checking for messages: {exception}")
+        record_failure(config, db, message, worker, exception)
+
+
+def record_completed(
+    config: AppConfig,
+    db: AppDatabase,
+    queue: deque[tuple[Message, Future, tuple | None, dict]],
+    worker: str,
+    leased: set[int],
+):
+    while queue and queue[0][1].done():
+        message, future, key, stats = queue.popleft()
+        record_check(config, db, message, future, key, stats, worker)
+        leased.discard(message.id)
+
+
+def renew_leases(db: AppDatabase, leased: set[int], worker: str, lease: float, renewed: float) -> float:
+    if time.monotonic() - renewed < lease / 3:
+        return renewed
+    if leased:
+        db.messages.renew_lease(worker, list(leased), lease)
+    return time.monotonic()
+
+
+def submit_message(
+    config: AppConfig,
+    db: AppDatabase,
+    executor: Executor | None,
+    message: Message,
+    ext: ExternalTaskDto,
+    version: str | None,
+) -> tuple[Future, tuple | None]:
+    if version is None:
+        return submit_check(executor, run_check, config, ext.group_title, ext.task, ext.variant, message.code), None
+    key = (ext.group_title, ext.task, ext.variant, hash_code(message.code), version)
+    cached = db.verdicts.get(*key)
+    if cached is not None:
+        print(f"Cached verdict for message {message.id}: {cached.ok}")
+        return submit_check(None, cached_check, cached.ok, cached.output), None
+    return submit_check(executor, run_check, config, ext.group_title, ext.task, ext.variant, message.code), key
+
+
+def resolve_coalesced(
+    config: AppConfig,
+    db: AppDatabase,
+    executor: Executor | None,
+    queue: deque[tuple[Message, Future, tuple | None, dict]],
+    future: Future,
+    older: list[tuple[Future, Message, ExternalTaskDto]],
+    version: str | None,
+) -> list[Future]:
+    passed = future.exception() is None and future.result()[0]
+    submitted = []
+    for placeholder, message, ext in older:
+        if passed:
+            placeholder.set_result(None)
+            continue
+        check, key = submit_message(config, db, executor, message, ext, version)
+        index = next(index for index, entry in enumerate(queue) if entry[1] is placeholder)
+        queue[index] = (message, check, key, queue[index][3])
+        submitted.append(check)
+    return submitted
+
+
+def process_messages(
+    config: AppConfig,
+    db: AppDatabase,
+    external: ExternalTaskManager,
+    messages: list[Message],
+    executor: Executor | None,
+    worker: str,
+):
+    print(f"Processing {len(messages)} incoming messages...")
+    claimed = datetime.datetime.now()
+    slots: dict[tuple[int, int, int], deque[tuple[Message, Future, tuple | None, dict]]] = dict()
+    futures: dict[Future, tuple[int, int, int]] = dict()
+    deferred: dict[tuple[int, int, int], list[tuple[Message, ExternalTaskDto, dict]]] = dict()
+    coalesced: dict[Future, list[tuple[Future, Message, ExternalTaskDto]]] = dict()
+    renewed = time.monotonic()
+    version = get_core_version(config.core_path) if config.verdict_cache else None
+    groups = {group.id: group for group in db.groups.get_by_ids({message.group for message in messages})}
+    variants = {variant.id: variant for variant in db.variants.get_by_ids({message.variant for message in messages})}
+    tasks = {task.id: task for task in db.tasks.get_by_ids({message.task for message in messages})}
+    seeds = {seed.group: seed for seed in db.seeds.get_final_seeds(groups)}
+    superseded = dict()
+    if config.coalesce_submissions:
+        superseded = db.messages.get_superseded([message.id for message in messages])
+    checked = []
+    for message in messages:
+        if message.attempts > config.worker_max_attempts:
+            error = message.error or f"Check was interrupted {message.attempts - 1} times"
+            record_failure(config, db, message, worker, error)
+        elif superseded.get(message.id):
+            record_superseded(db, message, worker)
+        else:
+            checked.append(message)
+    codes = db.messages.get_codes([message.id for message in checked])
+    leased = {message.id for message in checked}
+    for message in checked:
+        started = time.perf_counter()
+        group = groups[message.group]
+        variant = variants[message.variant]
+        task = tasks[message.task]
+        seed = seeds.get(message.group)
+        ext = external.get_external_task(group, variant, task, seed, config)
+        priority = "exam" if seed is not None and seed.active else "practice"
+        waited = (claimed - message.time).total_seconds()
+        print(f"g-{message.group}, t-{message.task}, v-{message.variant}, {priority} waited {round(waited, 2)} s")
+        print(f"external: {ext.group_title}, t-{ext.task}, v-{ext.variant}")
+        message.code = codes[message.id]
+        slot = (message.group, message.variant, message.task)
+        stats = dict(priority=priority, queue_duration=waited, analysis_task=ext.task)
+        if message.id in superseded:
+            stats.update(lookup_duration=time.perf_counter() - started)
+            deferred.setdefault(slot, []).append((message, ext, stats))
+            continue
+        future, key = submit_message(config, db, executor, message, ext, version)
+        futures[future] = slot
+        queue = slots.setdefault(slot, deque())
+        older = []
+        for previous, previous_ext, previous_stats in deferred.pop(slot, []):
+            placeholder = Future()
+            queue.append((previous, placeholder, None, previous_stats))
+            older.append((placeholder, previous, previous_ext))
+        if older:
+            coalesced[future] = older
+        stats.update(lookup_duration=time.perf_counter() - started)
+        queue.append((message, future, key, stats))
+        record_completed(config, db, queue, worker, leased)
+        renewed = renew_leases(db, leased, worker, config.worker_lease, renewed)
+    for slot, older in deferred.items():
+        queue = slots.setdefault(slot, deque())
+        for message, ext, stats in older:
+            future, key = submit_message(config, db, executor, message, ext, version)
+            futures[future] = slot
+            queue.append((message, future, key, stats))
+        record_completed(config, db, queue, worker, leased)
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=config.worker_lease / 3, return_when=FIRST_COMPLETED)
+        for future in done:
+            slot = futures[future]
+            if future in coalesced:
+                older = coalesced.pop(future)
+                for check in resolve_coalesced(config, db, executor, slots[slot], future, older, version):
+                    futures[check] = slot
+                    pending.add(check)
+            record_completed(config, db, slots[slot], worker, leased)
+        renewed = renew_leases(db, leased, worker, config.worker_lease, renewed)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def process_pending_messages(
+    config: AppConfig,
+    db: AppDatabase,
+    external: ExternalTaskManager,
+    executor: Executor | None = None,
+    worker: str | None = None,
+):
+    worker = worker or worker_id()
+    while True:
+        messages = db.messages.claim_pending(
+            worker,
+            config.worker_batch_size,
+            config.worker_lease,
+            config.scheduler_weights,
+        )
+        if not messages:
+            return
+        process_messages(config, db, external, messages, executor, worker)
+
+
+def record_analysis(
+    db: AppDatabase,
+    check: MessageCheck,
+    message: Message,
+    analyzed: bool,
+    order: int | None,
+    duration: float,
+):
+    print(f'Analysis result for message {message.id}: {analyzed}, {order}')
+    with db.unit_of_work():
+        db.checks.record_analysis(check.id, order if analyzed else None, duration)
+        if analyzed:
             db.statuses.record_achievement(
                 task=message.task,
                 variant=message.variant,
                 group=message.group,
                 achievement=order,
             )
-        except BaseException:
-            exception = get_exception_info()
-            print(f"Error occured while checking for messages: {exception}")
+
+
+def analysis_task(check: MessageCheck, message: Message) -> int:
+    return message.task if check.analysis_task is None else check.analysis_task
+
+
+def process_pending_analyses(config: AppConfig, db: AppDatabase):
+    while True:
+        pending = db.checks.get_pending_analyses(config.analysis_batch_size)
+        if not pending:
+            return
+        print(f"Analyzing {len(pending)} checked messages...")
+        tasks: dict[int, list[tuple[MessageCheck, Message]]] = dict()
+        for check, message in pending:
+            tasks.setdefault(analysis_task(check, message), []).append((check, message))
+        for task, items in tasks.items():
+            started = time.perf_counter()
+            results = analyze_batch(config, task, [message.code for _, message in items])
+            duration = (time.perf_counter() - started) / len(items)
+            for (check, message), (analyzed, order) in zip(items, results):
+                record_analysis(db, check, message, analyzed, order, duration)
+
+
+def create_pool(concurrency: int) -> Executor | None:
+    if concurrency <= 1:
+        return None
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    return ProcessPoolExecutor(max_workers=concurrency, mp_context=context)
+
+
+def create_executor(config: AppConfig) -> Executor | None:
+    return create_pool(config.check_concurrency)
+
+
+def open_wakeup(config: AppConfig, db: AppDatabase, channel: str) -> WakeupListener | None:
+    try:
+        return WakeupListener(config.worker_wakeup_socket, db.db.engine, channel)
+    except BaseException:
+        exception = get_exception_info()
+        print(f"Error occured while listening for {channel}: {exception}")
+        return None
+
+
+def wait_for_wakeup(wakeup: WakeupListener | None, interval: float) -> WakeupListener | None:
+    if wakeup is None:
+        time.sleep(interval)
+        return None
+    try:
+        wakeup.wait(interval)
+        return wakeup
+    except BaseException:
+        exception = get_exception_info()
+        print(f"Error occured while waiting for a wakeup: {exception}")
+        wakeup.close()
+        return None
 
 
 def background_worker(config: AppConfig):
     print(f"Starting background worker for database: {config.connection_string}")
-    db = AppDatabase(lambda: config.connection_string)
+    db = AppDatabase(lambda: config.connection_string, lambda: config.database_options)
+    lock = LeaderLock("worker", db.db.engine, config.leader_lock_directory)
+    wait_for_leadership(lock, config.leader_retry_interval)
+    print(f"Background worker {os.getpid()} is the leader now")
     ext = ExternalTaskManager(db.groups, db.tasks)
+    executor = create_executor(config)
+    worker = worker_id()
+    wakeup = None
+    while True:
+        keep_leadership(lock, config.leader_retry_interval)
+        wakeup = wakeup or open_wakeup(config, db, CHANNEL)
+        try:
+            process_pending_messages(config, db, ext, executor, worker)
+        except BrokenProcessPool:
+            print("Check pool is broken, restarting...")
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = create_executor(config)
+        except BaseException:
+            exception = get_exception_info()
+            print(f"Error occured inside the loop: {exception}")
+        wakeup = wait_for_wakeup(wakeup, config.worker_poll_interval)
+
+
+def store_reanalyzed(db: AppDatabase, futures: list[tuple[list[int], Future]]) -> int:
+    results = []
+    for checks, future in futures:
+        for check, (analyzed, order) in zip(checks, future.result()):
+            results.append((check, order if analyzed else None))
+    db.analysis_results.store(results)
+    return len(results)
+
+
+def reanalyze(config: AppConfig, db: AppDatabase, executor: Executor | None, depth: int = 1):
+    last = db.analysis_results.get_last_check()
+    if last is not None:
+        print(f"Resuming analysis after check {last}...")
+    last = last or 0
+    batches: deque[list[tuple[list[int], Future]]] = deque()
+    analyzed = 0
     while True:
+        batch = db.checks.get_checked_after(last, config.analysis_batch_size)
+        if batch:
+            last = batch[-1][0].id
+            tasks: dict[int, list[tuple[int, str]]] = dict()
+            for check, message in batch:
+                tasks.setdefault(analysis_task(check, message), []).append((check.id, message.code))
+            futures = []
+            for task, items in tasks.items():
+                checks = [check for check, _ in items]
+                codes = [code for _, code in items]
+                futures.append((checks, submit_check(executor, analyze_batch, config, task, codes)))
+            batches.append(futures)
+        while batches and (not batch or len(batches) > depth):
+            analyzed += store_reanalyzed(db, batches.popleft())
+            print(f"Analyzed {analyzed} programs")
+        if not batch:
+            break
+    db.analysis_results.apply()
+    return analyzed
+
+
+def analysis_worker(config: AppConfig):
+    print(f"Starting analysis worker for database: {config.connection_string}")
+    db = AppDatabase(lambda: config.connection_string, lambda: config.database_options)
+    lock = LeaderLock("analysis", db.db.engine, config.leader_lock_directory)
+    wait_for_leadership(lock, config.leader_retry_interval)
+    print(f"Analysis worker {os.getpid()} is the leader now")
+    wakeup = None
+    while True:
+        keep_leadership(lock, config.leader_retry_interval)
+        wakeup = wakeup or open_wakeup(config, db, ANALYSIS_CHANNEL)
         try:
-            process_pending_messages(config, db, ext)
+            process_pending_analyses(config, db)
         except BaseException:
             exception = get_exception_info()
             print(f"Error occured inside the loop: {exception}")
-        time.sleep(10)
+        wakeup = wait_for_wakeup(wakeup, config.analysis_poll_interval)
+
+
+def start_analysis_worker(config: AppConfig):
+    if config.no_background_worker:
+        return
+    process = Process(target=analysis_worker, args=(config,))
+    try:
+        process.start()
+        return process.pid
+    except Exception as e:
+        print(e)
 
 
 def start_background_worker(config: AppConfig):